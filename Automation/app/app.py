@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from fetcher import fetch_oclc_token, fetch_worldcat_data, clean_worldcat_data, CSV_COLUMNS
+from fetcher import fetch_oclc_token, fetch_worldcat_data, clean_worldcat_data, translate_records, CSV_COLUMNS
+from utils.translation import translate_batch
+from utils.omeka_uploader import make_session, send_with_retry, upload_items
 import time
-import json
-import requests
 import io  # Needed for download buffer
 
 # ---------------- Omeka config ----------------
@@ -45,16 +45,14 @@ def row_to_omeka_json(row):
         "element_texts": metadata
     }
 
-# ✅ Upload single item to Omeka via API
+# ✅ Upload single item to Omeka via API (pooled connection, retried on 429/5xx)
+_session = None
+
 def upload_item_to_omeka(row):
+    global _session
+    _session = _session or make_session()
     omeka_data = row_to_omeka_json(row)
-    response = requests.post(
-        OMEKA_URL,
-        headers={"Content-Type": "application/json"},
-        params={"key": OMEKA_API_KEY},
-        data=json.dumps(omeka_data)
-    )
-    return response
+    return send_with_retry(_session, "POST", OMEKA_URL, omeka_data, params={"key": OMEKA_API_KEY})
 
 # ---------------- Streamlit UI ----------------
 st.set_page_config(page_title="Archivo Venezuela Tool", layout="wide")
@@ -83,7 +81,7 @@ if uploaded_file:
                 try:
                     data = fetch_worldcat_data(str(oclc), token)
                     if data:
-                        cleaned = clean_worldcat_data(data)
+                        cleaned = clean_worldcat_data(data, translate=False)
                         all_metadata.append(cleaned)
                     else:
                         st.warning(f"⚠️ OCLC {oclc} not found or failed.")
@@ -92,6 +90,8 @@ if uploaded_file:
                 progress_bar.progress((idx + 1) / total)
                 time.sleep(0.5)
 
+            status_text.text("🌍 Translating Spanish fields...")
+            translate_records(all_metadata)
             result_df = pd.DataFrame(all_metadata)
             result_df = result_df.reindex(columns=CSV_COLUMNS)
 
@@ -109,24 +109,27 @@ if uploaded_file:
 if "result_df" in st.session_state:
     if st.button("📤 Upload to Omeka"):
         result_df = st.session_state["result_df"]
-        with st.spinner("Uploading items to Omeka..."):
-            success_count = 0
-            total = len(result_df)
-            for idx, row in result_df.iterrows():
-                response = upload_item_to_omeka(row)
-                title = row.get("Title") or f"Item {idx + 1}"
-                if response.status_code == 201:
-                    st.success(f"✅ [{idx + 1}/{total}] '{title}' uploaded.")
-                    success_count += 1
-                else:
-                    st.error(f"❌ [{idx + 1}/{total}] '{title}' failed: {response.status_code} - {response.text}")
-            st.success(f"🎉 Final Result: {success_count} out of {total} items uploaded to Omeka.")
+        rows = result_df.to_dict(orient="records")
+        payloads = [row_to_omeka_json(row) for row in rows]
+        success_count = 0
+        total = len(rows)
+        progress_bar = st.progress(0)
+
+        # Items are uploaded concurrently; results arrive as each one finishes
+        for done, result in enumerate(upload_items(payloads, OMEKA_URL, OMEKA_API_KEY), start=1):
+            idx = result["index"]
+            title = rows[idx].get("Title") or f"Item {idx + 1}"
+            if result["status"] == 201:
+                st.success(f"✅ [{idx + 1}/{total}] '{title}' uploaded.")
+                success_count += 1
+            else:
+                st.error(f"❌ [{idx + 1}/{total}] '{title}' failed: {result['status']} - {result['text']}")
+            progress_bar.progress(done / total)
+        st.success(f"🎉 Final Result: {success_count} out of {total} items uploaded to Omeka.")
 
 # ---------------- FAST Subject Enrichment ----------------
 # --- FAST START ---
 
-DEEPL_API_KEY = ""  # Optional: Paste your DeepL API key here
-
 def extract_fast_subjects(worldcat_data):
     subjects = []
 
@@ -142,34 +145,10 @@ def extract_fast_subjects(worldcat_data):
 
 
 
-def translate_to_spanish(text):
-    # Manual fallback dictionary
-    manual_translations = {
-        "Short stories": "Cuentos cortos",
-        "Fiction": "Ficción",
-        "Novels": "Novelas",
-        "Politics": "Política",
-        "Refugees": "Refugiados",
-        "Venezuela": "Venezuela",  # Proper nouns usually stay the same
-        "Poetry": "Poesía",
-        "History": "Historia"
-    }
-
-    if text in manual_translations:
-        return manual_translations[text]
-
-    # Optional DeepL fallback
-    if DEEPL_API_KEY:
-        url = "https://api-free.deepl.com/v2/translate"
-        params = {
-            "auth_key": DEEPL_API_KEY,
-            "text": text,
-            "target_lang": "ES"
-        }
-        response = requests.post(url, data=params)
-        return response.json()["translations"][0]["text"]
-    
-    return ""  # No translation available
+# Glossary first (manual terms live in utils/translation.py), then the engine set by
+# TRANSLATION_ENGINE (google, marian for offline use, or deepl with DEEPL_API_KEY)
+def translate_to_spanish(labels):
+    return translate_batch(labels, source_lang="en")
 
 
 st.markdown("---")
@@ -201,16 +180,20 @@ if fast_file:
 
                             subjects = extract_fast_subjects(data)
                             for label_en, uri in subjects:
-                                label_es = translate_to_spanish(label_en)
                                 enriched_data.append({
                                     "oclc_number": oclc,
                                     "label_en": label_en,
-                                    "label_es": label_es,
+                                    "label_es": "",
                                     "uri": uri
                                 })
                         except Exception as e:
                             st.warning(f"Failed for OCLC {oclc}: {e}")
 
+                    # Translate every label in one batched pass
+                    labels_es = translate_to_spanish([row["label_en"] for row in enriched_data])
+                    for row, label_es in zip(enriched_data, labels_es):
+                        row["label_es"] = label_es
+
                 if enriched_data:
                     fast_output_df = pd.DataFrame(enriched_data)
                     st.dataframe(fast_output_df)
@@ -0,0 +1,115 @@
+"""
+Benchmark for utils/completeness_checker.validate_metadata.
+
+Run from Automation/app:  python benchmark_completeness.py [rows]
+
+Builds a synthetic Omeka export (200k rows by default) with blank, missing and
+HTML-laden cells, times the vectorized checker on it, and checks on a sample
+that its report matches the previous row-by-row implementation exactly, and that
+nullable string columns (pd.NA cells) and omeka_fetcher's DataFrames are checked the same way.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from omeka_fetcher import omeka_items_to_dataframe
+from utils.completeness_checker import REQUIRED_FIELDS, clean_html, validate_metadata
+
+
+def legacy_validate_metadata(df):
+    """The original iterrows() implementation, kept here as the reference output."""
+    report_rows = []
+    df = df.copy()
+    completeness_column = []
+
+    for idx, row in df.iterrows():
+        missing_fields = []
+        for field in REQUIRED_FIELDS:
+            if field not in row or pd.isna(row[field]) or str(row[field]).strip() == "":
+                missing_fields.append(field)
+
+        completeness_column.append("✅" if len(missing_fields) == 0 else "❌")
+
+        report_rows.append({
+            "Index": idx,
+            "Identifier": row.get("Identifier", "N/A"),
+            "Title (Cleaned)": clean_html(row.get("Title") or row.get("Título", "N/A")),
+            "Missing Fields": ", ".join(missing_fields) if missing_fields else "None",
+            "Complete": "✅" if len(missing_fields) == 0 else "❌"
+        })
+
+    df["Metadata Complete"] = completeness_column
+
+    return pd.DataFrame(report_rows), df
+
+
+def make_sheet(rows, seed=0):
+    """Synthetic export: most fields filled, some blank/whitespace/NaN, some titles with HTML."""
+    rng = np.random.default_rng(seed)
+
+    def column(values):
+        pick = rng.integers(0, len(values), rows)
+        return np.array(values, dtype=object)[pick]
+
+    return pd.DataFrame({
+        "Identifier": [f"AV-{i:07d}" for i in range(rows)],
+        "Title": column(["Doña Bárbara", "<p>Canaima</p>", "Las lanzas coloradas &amp; otros", "", None, "  "]),
+        "Título": column(["Doña Bárbara", "<em>Cantaclaro</em>", np.nan, ""]),
+        "Creator": column(["Rómulo Gallegos", "Teresa de la Parra", "", np.nan]),
+        "Language": column(["Spanish", "English", " "]),
+        "Date": column(["1929", "1935", np.nan]),
+        "Rights": column(["Public domain", "", "CC BY"]),
+        "Description": column(["Novela", "<b>Ensayo</b>"]),
+    })  # no "Lenguaje"/"Derechos" columns, so those are reported missing everywhere
+
+
+def check_fetcher_frame():
+    """The Validate page feeds omeka_fetcher's frame (Arrow-backed text when pyarrow is installed) straight in."""
+    def element(name, text):
+        return {"element": {"name": name}, "text": text}
+
+    items = [
+        {"id": 1, "element_texts": [element("Title", "<p>Doña Bárbara</p>"), element("Creator", "Rómulo Gallegos")]},
+        {"id": 2, "element_texts": [element("Creator", "Teresa de la Parra")]},  # no Title at all
+    ]
+    report, _ = validate_metadata(omeka_items_to_dataframe(items))
+    assert report["Title (Cleaned)"].tolist() == ["Doña Bárbara", "N/A"], report
+    assert report["Missing Fields"].str.startswith("Title").tolist() == [False, True], report
+    print("✅ omeka_fetcher output (items with missing elements) passes through the checker")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sheet = make_sheet(rows)
+
+    start = time.perf_counter()
+    report, checked = validate_metadata(sheet)
+    elapsed = time.perf_counter() - start
+    print(f"vectorized: {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+    sample = sheet.sample(n=min(rows, 5_000), random_state=1)
+    start = time.perf_counter()
+    expected_report, expected_df = legacy_validate_metadata(sample)
+    legacy_elapsed = time.perf_counter() - start
+    print(f"row-by-row: {len(sample):,} rows in {legacy_elapsed:.2f}s "
+          f"(≈{legacy_elapsed * rows / len(sample):.0f}s projected for {rows:,})")
+
+    actual_report, actual_df = validate_metadata(sample)
+    pd.testing.assert_frame_equal(actual_report, expected_report)
+    pd.testing.assert_frame_equal(actual_df, expected_df)
+    print("✅ report and annotated sheet identical to the row-by-row implementation")
+
+    # Nullable string columns (e.g. Arrow-backed frames from omeka_fetcher) hold pd.NA, which
+    # has no truth value; the checker must accept them and flag the same missing fields
+    nullable = sample.astype({c: "string" for c in sample.columns if c != "Identifier"})
+    nullable_report, _ = validate_metadata(nullable)
+    pd.testing.assert_series_equal(nullable_report["Missing Fields"], actual_report["Missing Fields"])
+    print("✅ nullable string columns give the same missing-field report")
+
+    check_fetcher_frame()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,10 @@ import csv
 import json
 import time
 from dotenv import load_dotenv
-from googletrans import Translator
+from utils.translation import translate_batch
 
 
 load_dotenv()
-translator = Translator()
 
 
 # ✅ API credentials
@@ -27,6 +26,16 @@ CSV_COLUMNS = [
     "Cobertura", "Coverage", "Relation", "Relación", "Source"
 ]
 
+# ✅ Spanish column ← English column, filled in by translate_records
+TRANSLATED_COLUMNS = {
+    "Título": "Title",
+    "Subject (ES)": "Subject (EN)",
+    "Tipo (ES)": "Type (EN)",
+    "Descripción": "Description",
+    "Lenguaje": "Language",
+    "Formato": "Format",
+}
+
 
 # ✅ Token fetch function
 def fetch_oclc_token():
@@ -42,8 +51,9 @@ def fetch_oclc_token():
         print("❌ Token Error:", response.text)
         return None
 
-# ✅ Fetch metadata from WorldCat
+# ✅ Fetch metadata from WorldCat (cached locally, see utils/worldcat_cache.py)
 import json
+from utils.worldcat_cache import fetch_bib
 
 def fetch_worldcat_data(oclc_number, token):
     headers = {
@@ -52,34 +62,34 @@ def fetch_worldcat_data(oclc_number, token):
     }
     url = f"https://americas.discovery.api.oclc.org/worldcat/search/v2/bibs/{oclc_number}"
 
-    response = requests.get(url, headers=headers)
-
     print(f"📡 Fetching OCLC: {oclc_number}")
-    print(f"🔁 URL: {url}")
-    print(f"📄 Status Code: {response.status_code}")
 
-    if response.status_code == 200:
-        json_data = response.json()
-        print(json.dumps(json_data, indent=2))  # 🔍 See the full response
-        return json_data
-    else:
-        print("❌ Error:", response.text)
-        return None
+    def do_get(conditional_headers):
+        response = requests.get(url, headers={**headers, **conditional_headers})
+        print(f"🔁 URL: {url}")
+        print(f"📄 Status Code: {response.status_code}")
+        if response.status_code == 200:
+            print(json.dumps(response.json(), indent=2))  # 🔍 See the full response
+        elif response.status_code != 304:
+            print("❌ Error:", response.text)
+        return response
 
+    return fetch_bib(oclc_number, do_get)
 
 
 
-# ✅ Clean and match data to bilingual column format
-from googletrans import Translator
-translator = Translator()
 
-def clean_worldcat_data(data):
-    def safe_translate(text):
-        try:
-            return translator.translate(text, src="en", dest="es").text if text else ""
-        except:
-            return ""
+# ✅ Translate the Spanish columns of many records in one batched pass
+def translate_records(records):
+    slots = [(record, es, en) for record in records for es, en in TRANSLATED_COLUMNS.items()]
+    translations = translate_batch([record[en] for record, _, en in slots], source_lang="en")
+    for (record, es, _), text in zip(slots, translations):
+        record[es] = text
 
+
+# ✅ Clean and match data to bilingual column format
+# (translate=False leaves the Spanish columns for a later translate_records call)
+def clean_worldcat_data(data, translate=True):
     def get_nested_text(obj, *keys):
         try:
             for key in keys:
@@ -119,23 +129,23 @@ def clean_worldcat_data(data):
     description = get_nested_text(data, "description", "physicalDescription")
     oclc = get_nested_text(data, "identifier", "oclcNumber")
 
-    return {
+    record = {
         "Identifier": oclc,
         "Title": title,
-        "Título": safe_translate(title),
+        "Título": "",
         "Creator": creator,
         "Contributor": "",  # Optional
         "Subject (EN)": subjects,
-        "Subject (ES)": safe_translate(subjects),
+        "Subject (ES)": "",
         "Type (EN)": format_en,
-        "Tipo (ES)": safe_translate(format_en),
+        "Tipo (ES)": "",
         "Description": description,
-        "Descripción": safe_translate(description),
+        "Descripción": "",
         "Date": pub_date,
         "Language": language,
-        "Lenguaje": safe_translate(language),
+        "Lenguaje": "",
         "Format": format_en,
-        "Formato": safe_translate(format_en),
+        "Formato": "",
         "Rights": "",  # Not available in your JSON
         "Derechos": "",
         "Publisher": publisher,
@@ -145,6 +155,9 @@ def clean_worldcat_data(data):
         "Relación": "",
         "Source": ""
     }
+    if translate:
+        translate_records([record])
+    return record
 
 
 
@@ -168,10 +181,11 @@ def batch_import(oclc_numbers, token):
         print(f"🔍 Fetching {oclc}...")
         raw = fetch_worldcat_data(oclc, token)
         if raw:
-            cleaned = clean_worldcat_data(raw)
+            cleaned = clean_worldcat_data(raw, translate=False)
             all_data.append(cleaned)
         time.sleep(1)  # Prevent rate limit
 
+    translate_records(all_data)
     if all_data:
         write_to_csv(all_data, CSV_FILE_PATH)
     else:
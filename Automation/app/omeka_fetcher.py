@@ -1,29 +1,140 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from urllib.parse import parse_qs, urlparse
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from utils.omeka_mirror import open_mirror, sync_mirror
+
+try:
+    import pyarrow  # noqa: F401  (optional: Arrow-backed text columns take far less memory)
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = object
+
+# Full-archive sweeps: items per request, pages in flight, attempts per page
+FETCH_PER_PAGE = int(os.getenv("OMEKA_PER_PAGE", "50"))
+FETCH_WORKERS = int(os.getenv("OMEKA_FETCH_WORKERS", "4"))
+FETCH_RETRIES = 3
+FETCH_TIMEOUT = 30
+
+# Repeated elements (several Subjects, Creators...) are kept in one cell joined by this
+MULTI_VALUE_SEPARATOR = " | "
+
+# Fetch one page, retrying on its own (with backoff) if it fails
+def fetch_page(session, api_url, page, params, retries=FETCH_RETRIES):
+    for attempt in range(retries):
+        try:
+            response = session.get(api_url, params={**params, "page": page}, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+            return response
+        except requests.RequestException:
+            if attempt == retries - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+# Number of pages, from the Link rel="last" header or Omeka-Total-Results
+def page_count(response, page_size):
+    last_url = response.links.get("last", {}).get("url")
+    if last_url:
+        last_page = parse_qs(urlparse(last_url).query).get("page", [""])[0]
+        if last_page.isdigit():
+            return int(last_page)
+    total = response.headers.get("Omeka-Total-Results", "")
+    if total.isdigit() and page_size:
+        return -(-int(total) // page_size)
+    return None
+
+# Stream every item of the archive, page by page in order, with pages fetched in parallel
+def iter_omeka_items(api_url, api_key=None, per_page=FETCH_PER_PAGE, max_workers=FETCH_WORKERS):
+    params = {"per_page": per_page}
+    if api_key:
+        params["key"] = api_key
+
+    with requests.Session() as session:
+        session.mount("https://", HTTPAdapter(pool_maxsize=max(1, max_workers)))
+        first = fetch_page(session, api_url, 1, params)
+        items = first.json()
+        yield from items
+        if not items:
+            return
+
+        # The server may cap per_page, so size pages by what it actually returned
+        pages = page_count(first, len(items))
+        if pages is None:
+            # No count available: walk pages one by one until an empty one
+            page = 2
+            while True:
+                items = fetch_page(session, api_url, page, params).json()
+                if not items:
+                    return
+                yield from items
+                page += 1
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            window = max(1, max_workers) * 2  # pages requested ahead of the reader, bounds memory
+            pending, next_page = {}, 2
+            for page in range(2, pages + 1):
+                while next_page <= min(page + window - 1, pages):
+                    pending[next_page] = pool.submit(fetch_page, session, api_url, next_page, params)
+                    next_page += 1
+                yield from pending.pop(page).result().json()
 
 # Fetch all items from Omeka API
-def fetch_all_omeka_items(api_url, api_key=None):
-    items = []
-    page = 1
-    while True:
-        params = {"page": page}
-        if api_key:
-            params["key"] = api_key
-        response = requests.get(api_url, params=params)
-        data = response.json()
-        if not data:
-            break
-        items.extend(data)
-        page += 1
-    return items
-
-# Convert Omeka item list into a clean DataFrame
-def omeka_items_to_dataframe(items):
-    rows = []
-    for item in items:
-        row = {"Omeka ID": item.get("id")}
-        for element in item.get("element_texts", []):
-            field = element["element"]["name"]
-            row[field] = element["text"]
-        rows.append(row)
-    return pd.DataFrame(rows)
+# (incremental=True syncs the local mirror, downloading only items modified since the last run)
+def fetch_all_omeka_items(api_url, api_key=None, incremental=False):
+    if incremental:
+        sync_mirror(api_url, api_key)
+        return open_mirror(api_url).items()
+    return list(iter_omeka_items(api_url, api_key))
+
+# Build a DataFrame column by column from a stream of (item id, [(field, text), ...]) records.
+# Each column only stores the rows that have it until the end, and columns are converted
+# (and their buffers freed) one at a time, so per-item dicts never pile up.
+def _columnar_dataframe(records, multi_value="join"):
+    ids = []
+    columns = {}  # field -> (row numbers, values)
+    for row, (item_id, pairs) in enumerate(records):
+        ids.append(item_id)
+        values = {}
+        for field, text in pairs:
+            values.setdefault(field, []).append(text)
+        for field, texts in values.items():
+            rows, cells = columns.setdefault(field, ([], []))
+            rows.append(row)
+            if multi_value == "list":
+                cells.append(texts)
+            else:
+                cells.append(texts[0] if len(texts) == 1 else MULTI_VALUE_SEPARATOR.join(map(str, texts)))
+
+    # Joined text columns use "" for elements an item lacks, so Arrow-backed columns hold no
+    # pd.NA (which has no truth value and breaks row checks downstream); list columns use None
+    data = {"Omeka ID": pd.Series(ids)}
+    for field in list(columns):
+        rows, cells = columns.pop(field)
+        full = [None if multi_value == "list" else ""] * len(ids)
+        for row, cell in zip(rows, cells):
+            full[row] = cell
+        data[field] = pd.Series(full, dtype=object if multi_value == "list" else TEXT_DTYPE)
+    return pd.DataFrame(data)
+
+# Convert Omeka items (a list or the iter_omeka_items stream) into a clean DataFrame.
+# multi_value="join" keeps repeated elements as one "a | b" cell, "list" as Python lists.
+def omeka_items_to_dataframe(items, multi_value="join"):
+    records = (
+        (item.get("id"), ((e["element"]["name"], e["text"]) for e in item.get("element_texts", [])))
+        for item in items
+    )
+    return _columnar_dataframe(records, multi_value)
+
+# Same table as omeka_items_to_dataframe, built with one query against the local mirror
+def omeka_mirror_dataframe(api_url, multi_value="join"):
+    rows = open_mirror(api_url).element_rows()
+    records = (
+        (item_id, ((field, text) for _, field, text in group))
+        for item_id, group in groupby(rows, key=lambda r: r[0])
+    )
+    return _columnar_dataframe(records, multi_value)
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from omeka_fetcher import fetch_all_omeka_items, omeka_items_to_dataframe
+from omeka_fetcher import iter_omeka_items, omeka_items_to_dataframe, omeka_mirror_dataframe
+from utils.omeka_mirror import sync_mirror
 from utils.link_checker import check_links
 from utils.image_checker import validate_images
 from utils.completeness_checker import validate_metadata
@@ -9,13 +10,23 @@ st.title("🔍 Validate Live Metadata from Omeka")
 
 API_URL = "https://archivovenezuela.com/raagya/api/items"
 
+incremental = st.checkbox("⚡ Incremental sync (only download items changed since the last fetch)", value=True)
+
 if st.button("📥 Fetch Metadata from Omeka"):
     with st.spinner("Fetching data..."):
-        items = fetch_all_omeka_items(API_URL)
-        if not items:
+        try:
+            if incremental:
+                sync_mirror(API_URL)
+                df = omeka_mirror_dataframe(API_URL)
+            else:
+                # Items stream from the API straight into columns, never all held as JSON at once
+                df = omeka_items_to_dataframe(iter_omeka_items(API_URL))
+        except Exception as e:
+            st.error(f"❌ API call failed: {e}")
+            df = pd.DataFrame()
+        if df.empty:
             st.error("❌ No items found or API call failed.")
         else:
-            df = omeka_items_to_dataframe(items)
             st.success(f"✅ {len(df)} metadata items fetched.")
             st.dataframe(df)
 
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import re
 from html import unescape
@@ -10,33 +11,73 @@ REQUIRED_FIELDS = [
     "Rights", "Derechos"
 ]
 
+TAG_RE = re.compile(r"<[^>]+>")
+
 def clean_html(raw_text):
     if not isinstance(raw_text, str):
         return raw_text
-    text = re.sub(r"<[^>]+>", "", raw_text)  # Remove HTML tags
+    text = TAG_RE.sub("", raw_text)  # Remove HTML tags
     return unescape(text).strip()
 
+def clean_html_series(values):
+    """clean_html over a whole column of any dtype; missing and non-string cells are passed through unchanged."""
+    values = values.astype(object)
+    present = values.notna().to_numpy(dtype=bool)
+    is_str = pd.Series(present, index=values.index)
+    is_str[present] = [isinstance(v, str) for v in values[present]]
+    if not is_str.any():
+        return values
+    text = values[is_str].astype(str).str.replace(TAG_RE, "", regex=True)
+    has_entity = text.str.contains("&", regex=False)
+    text[has_entity] = text[has_entity].map(unescape)
+    cleaned = values.copy()
+    cleaned[is_str] = text.str.strip()
+    return cleaned
+
+def is_blank(values):
+    """True where a cell is missing or whitespace only (object, string or Arrow-backed columns alike)."""
+    missing = values.isna().to_numpy(dtype=bool)
+    text = values.astype(object).where(~missing, "").astype(str)
+    return pd.Series(missing | (text.str.strip() == "").to_numpy(dtype=bool), index=values.index)
+
 def validate_metadata(df):
-    report_rows = []
     df = df.copy()
-    completeness_column = []
+    if df.empty:
+        df["Metadata Complete"] = []
+        return pd.DataFrame([]), df
 
-    for idx, row in df.iterrows():
-        missing_fields = []
-        for field in REQUIRED_FIELDS:
-            if field not in row or pd.isna(row[field]) or str(row[field]).strip() == "":
-                missing_fields.append(field)
+    # One mask per required field; absent columns count as missing everywhere
+    all_missing = pd.Series(True, index=df.index)
+    missing_fields = pd.Series("", index=df.index, dtype=object)
+    any_missing = pd.Series(False, index=df.index)
+    for field in REQUIRED_FIELDS:
+        mask = is_blank(df[field]) if field in df.columns else all_missing
+        missing_fields = missing_fields.where(~mask, missing_fields + field + ", ")
+        any_missing |= mask
+    missing_fields = missing_fields.str[:-2].where(any_missing, "None")
+    complete = any_missing.map({True: "❌", False: "✅"})
 
-        completeness_column.append("✅" if len(missing_fields) == 0 else "❌")
+    # Title, falling back to Título (or "N/A") wherever Title is falsy. pd.NA counts as falsy;
+    # NaN is truthy in Python and stays, as in the row-by-row version
+    fallback = df["Título"] if "Título" in df.columns else pd.Series("N/A", index=df.index, dtype=object)
+    if "Title" in df.columns:
+        title = df["Title"].astype(object)
+        present = title.notna().to_numpy(dtype=bool)
+        truthy = present.copy()
+        truthy[present] = [bool(v) for v in title[present]]
+        truthy |= np.array([isinstance(v, float) for v in title], dtype=bool)  # NaN
+        title = title.where(truthy, fallback.astype(object))
+    else:
+        title = fallback
 
-        report_rows.append({
-            "Index": idx,
-            "Identifier": row.get("Identifier", "N/A"),
-            "Title (Cleaned)": clean_html(row.get("Title") or row.get("Título", "N/A")),
-            "Missing Fields": ", ".join(missing_fields) if missing_fields else "None",
-            "Complete": "✅" if len(missing_fields) == 0 else "❌"
-        })
+    df["Metadata Complete"] = complete.to_numpy()
 
-    df["Metadata Complete"] = completeness_column
+    report = pd.DataFrame({
+        "Index": df.index.to_numpy(),
+        "Identifier": df["Identifier"].to_numpy() if "Identifier" in df.columns else "N/A",
+        "Title (Cleaned)": clean_html_series(title).to_numpy(),
+        "Missing Fields": missing_fields.to_numpy(),
+        "Complete": complete.to_numpy(),
+    })
 
-    return pd.DataFrame(report_rows), df
+    return report, df
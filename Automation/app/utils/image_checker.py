@@ -1,33 +1,176 @@
+import os
+import time
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from utils.url_health import default_cache
+
+# Concurrency: images checked at once overall / per host
+IMAGE_CHECK_WORKERS = int(os.getenv("IMAGE_CHECK_WORKERS", "16"))
+IMAGE_CHECK_PER_HOST = int(os.getenv("IMAGE_CHECK_PER_HOST", "4"))
+IMAGE_CHECK_TIMEOUT = 5
+# Bytes read per image: enough for every header below (JPEG can need a few dozen KB of EXIF)
+IMAGE_HEAD_BYTES = 64 * 1024
+IMAGE_CHUNK = 4096
+
+# Content-Type spellings that mean the same format
+MIME_ALIASES = {"image/jpg": "image/jpeg", "image/pjpeg": "image/jpeg", "image/x-png": "image/png",
+                "image/x-ms-bmp": "image/bmp", "image/x-bmp": "image/bmp"}
+GENERIC_TYPES = {"", "application/octet-stream", "binary/octet-stream"}
+
+
+def _jpeg_size(head):
+    """Walk JPEG segments up to the first SOF marker; None until that marker is in `head`."""
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", head[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack(">H", head[i + 2:i + 4])[0]
+    return None
+
+
+def sniff_image(head):
+    """
+    Identify an image from its first bytes: (mime type, width, height).
+    Width/height are None when the header doesn't carry them (TIFF) or isn't complete yet.
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ("image/png", *struct.unpack(">II", head[16:24])) if len(head) >= 24 else ("image/png", None, None)
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ("image/gif", *struct.unpack("<HH", head[6:10])) if len(head) >= 10 else ("image/gif", None, None)
+    if head[:2] == b"\xff\xd8":
+        return ("image/jpeg", *(_jpeg_size(head) or (None, None)))
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", head[26:30])
+            return "image/webp", w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return "image/webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return "image/webp", int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+        return "image/webp", None, None
+    if head[:2] == b"BM" and len(head) >= 26:
+        w, h = struct.unpack("<ii", head[18:26])
+        return "image/bmp", w, abs(h)
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "image/tiff", None, None
+    return None, None, None
+
+
+def inspect_image(session, url):
+    """
+    Read only the start of the file (ranged, streamed) and compare it with the declared type.
+    The response is always closed, so its connection goes straight back to the pool.
+    """
+    result = {"status": "Error", "final_url": "", "content_type": "", "content_length": None,
+              "error": "", "checked_at": time.time(), "details": {}}
+    head = b""
+    try:
+        with session.get(url, headers={"Range": f"bytes=0-{IMAGE_HEAD_BYTES - 1}"}, stream=True,
+                         allow_redirects=True, timeout=IMAGE_CHECK_TIMEOUT) as r:
+            result.update(status=r.status_code, final_url=r.url, content_type=r.headers.get("Content-Type", ""))
+            if r.status_code < 400:
+                for chunk in r.iter_content(IMAGE_CHUNK):
+                    head += chunk
+                    detected, width, height = sniff_image(head)
+                    if len(head) >= IMAGE_HEAD_BYTES or (detected and (width or detected == "image/tiff")):
+                        break
+                    if not detected and len(head) >= 32:
+                        break
+    except Exception as e:
+        result["error"] = str(e)
+
+    http_ok = isinstance(result["status"], int) and result["status"] < 400
+    detected, width, height = sniff_image(head) if http_ok else (None, None, None)
+    declared = result["content_type"].split(";")[0].strip().lower()
+    declared = MIME_ALIASES.get(declared, declared)
+    if result["error"]:
+        pass
+    elif not http_ok:
+        result["error"] = f"HTTP {result['status']}"
+    elif not detected:
+        result["error"] = "Not a recognised image file"
+    elif declared not in GENERIC_TYPES and declared != detected:
+        result["error"] = f"Declared {declared} but file is {detected}"
+    valid = bool(detected) and not result["error"]
+    result["details"] = {"image": {"format": detected, "width": width, "height": height, "valid": valid},
+                         "ok": valid}  # not an image / truncated / mislabelled → cached on the short fail TTL
+    return result
+
+
+def inspect_images(urls, max_workers=IMAGE_CHECK_WORKERS, per_host=IMAGE_CHECK_PER_HOST):
+    """
+    Inspect each distinct URL once, concurrently, at most `per_host` at a time per host.
+    Fresh results come from the shared URL health cache (utils/url_health.py).
+    """
+    unique = list(dict.fromkeys(urls))
+    cache = default_cache()
+    hosts = {urlparse(url).netloc for url in unique}
+    host_limits = {host: threading.BoundedSemaphore(max(1, per_host)) for host in hosts}
+
+    def check(url):
+        cached = cache.get(url, checker="image")
+        if cached and "image" in cached["details"]:
+            return cached
+        with host_limits[urlparse(url).netloc]:
+            result = inspect_image(session, url)
+        cache.put(url, result, checker="image")
+        return result
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        adapter = HTTPAdapter(pool_connections=max(1, len(hosts)), pool_maxsize=max(1, per_host))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return dict(zip(unique, pool.map(check, unique)))
+
 
 def validate_images(df):
     df = df.copy()
-    report_rows = []
 
     image_fields = [col for col in df.columns if df[col].astype(str).str.startswith("http").any()]
 
+    cells = []
     for idx, row in df.iterrows():
         for field in image_fields:
             url = row.get(field)
             if pd.notna(url) and isinstance(url, str) and url.startswith("http"):
-                try:
-                    r = requests.get(url, stream=True, timeout=5)
-                    mime_type = r.headers.get("Content-Type", "")
-                    is_image = mime_type.startswith("image/")
-                    error = ""
-                except Exception as e:
-                    mime_type = ""
-                    is_image = False
-                    error = str(e)
-
-                report_rows.append({
-                    "Index": idx,
-                    "Field": field,
-                    "URL": url,
-                    "MIME Type": mime_type or "N/A",
-                    "Valid Image": "✅" if is_image else "❌",
-                    "Error": error
-                })
+                # Repeated Omeka elements arrive as one cell joined by " | "
+                for part in url.split(" | "):
+                    if part.strip().startswith("http"):
+                        cells.append((idx, field, part.strip()))
+
+    checked = inspect_images(url for _, _, url in cells)
+
+    report_rows = []
+    for idx, field, url in cells:
+        result = checked[url]
+        image = result["details"]["image"]
+        report_rows.append({
+            "Index": idx,
+            "Field": field,
+            "URL": url,
+            "MIME Type": result["content_type"] or "N/A",
+            "Detected Format": image["format"] or "N/A",
+            "Dimensions": f"{image['width']}×{image['height']}" if image["width"] else "N/A",
+            "Valid Image": "✅" if image["valid"] else "❌",
+            "Error": result["error"]
+        })
 
     return pd.DataFrame(report_rows), df
@@ -1,36 +1,68 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from utils.url_health import check_url
+
+# Concurrency: URLs checked at once overall / per host
+LINK_CHECK_WORKERS = int(os.getenv("LINK_CHECK_WORKERS", "16"))
+LINK_CHECK_PER_HOST = int(os.getenv("LINK_CHECK_PER_HOST", "4"))
+LINK_CHECK_TIMEOUT = 5
+
+
+def check_urls(urls, max_workers=LINK_CHECK_WORKERS, per_host=LINK_CHECK_PER_HOST):
+    """
+    Probe each distinct URL once, concurrently, with at most `per_host` requests per host.
+    Results come from the shared URL health cache (utils/url_health.py) while fresh.
+    """
+    unique = list(dict.fromkeys(urls))
+    hosts = {urlparse(url).netloc for url in unique}
+    host_limits = {host: threading.BoundedSemaphore(max(1, per_host)) for host in hosts}
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        adapter = HTTPAdapter(pool_connections=max(1, len(hosts)), pool_maxsize=max(1, per_host))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        results = pool.map(
+            lambda url: check_url(url, session, LINK_CHECK_TIMEOUT, limit=host_limits[urlparse(url).netloc]),
+            unique,
+        )
+        return dict(zip(unique, results))
+
 
 def check_links(df):
     df = df.copy()
-    report_rows = []
 
     url_fields = [col for col in df.columns if df[col].astype(str).str.startswith("http").any()]
 
+    cells = []
     for idx, row in df.iterrows():
         for field in url_fields:
             url = row.get(field)
             if pd.notna(url) and isinstance(url, str) and url.startswith("http"):
-                try:
-                    r = requests.head(url, allow_redirects=True, timeout=5)
-                    status = r.status_code
-                    final_url = r.url
-                    is_valid = status == 200
-                    error = ""
-                except Exception as e:
-                    status = "Error"
-                    final_url = ""
-                    is_valid = False
-                    error = str(e)
-
-                report_rows.append({
-                    "Index": idx,
-                    "Field": field,
-                    "URL": url,
-                    "Final URL": final_url or "N/A",
-                    "Status": status,
-                    "Valid": "✅" if is_valid else "❌",
-                    "Error": error
-                })
+                # Repeated Omeka elements arrive as one cell joined by " | "
+                for part in url.split(" | "):
+                    if part.strip().startswith("http"):
+                        cells.append((idx, field, part.strip()))
+
+    # Identical URLs across rows and columns are only checked once
+    checked = check_urls(url for _, _, url in cells)
+
+    report_rows = []
+    for idx, field, url in cells:
+        result = checked[url]
+        report_rows.append({
+            "Index": idx,
+            "Field": field,
+            "URL": url,
+            "Final URL": result["final_url"] or "N/A",
+            "Status": result["status"],
+            "Valid": "✅" if result["status"] in (200, 206) else "❌",
+            "Error": result["error"]
+        })
 
     return pd.DataFrame(report_rows), df
@@ -0,0 +1,367 @@
+# utils/translation.py
+import os
+import csv
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import requests
+
+# Engine used by every caller: google (free web endpoint), marian (local CPU model) or deepl
+TRANSLATION_ENGINE = os.getenv("TRANSLATION_ENGINE", "google").strip().lower()
+
+# Persistent translation memory shared by every run (and every tool on this machine)
+TM_PATH = os.getenv(
+    "TRANSLATION_MEMORY_PATH",
+    os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "translation_memory.sqlite3"),
+)
+TM_LRU_SIZE = int(os.getenv("TRANSLATION_MEMORY_LRU", "5000"))
+
+# Segments are packed into requests of at most this many characters, one segment per line
+BATCH_CHAR_LIMIT = int(os.getenv("TRANSLATION_BATCH_CHARS", "4500"))
+
+# Local MarianMT model (optional dependency: pip install transformers sentencepiece torch)
+MARIAN_MODEL = os.getenv("MARIAN_MODEL", "Helsinki-NLP/opus-mt-en-es")
+MARIAN_BATCH_SIZE = int(os.getenv("MARIAN_BATCH_SIZE", "16"))
+
+DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "")
+DEEPL_API_URL = os.getenv("DEEPL_API_URL", "https://api-free.deepl.com/v2/translate")
+
+# Extra glossary entries: CSV with `english,spanish` columns
+GLOSSARY_PATH = os.getenv("TRANSLATION_GLOSSARY_PATH", "")
+
+# First-pass glossary (English → Spanish): controlled terms that must always read the same
+GLOSSARY = {
+    "Short stories": "Cuentos cortos",
+    "Fiction": "Ficción",
+    "Novels": "Novelas",
+    "Politics": "Política",
+    "Refugees": "Refugiados",
+    "Venezuela": "Venezuela",  # Proper nouns usually stay the same
+    "Poetry": "Poesía",
+    "History": "Historia",
+    "Book": "Libro",
+    "English": "Inglés",
+    "Spanish": "Español",
+    "French": "Francés",
+    "eng": "Inglés",
+    "spa": "Español",
+    "fre": "Francés",
+}
+
+
+class TranslationMemory:
+    """SQLite-backed translation memory with an in-process LRU in front of it."""
+
+    def __init__(self, path: str = TM_PATH, lru_size: int = TM_LRU_SIZE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"lru_hits": 0, "disk_hits": 0, "misses": 0}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_text TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                engine      TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (source_text, source_lang, target_lang, engine)
+            )
+        """)
+        self._conn.commit()
+
+    def _remember(self, key: tuple, translation: str) -> None:
+        self._lru[key] = translation
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, text: str, source: str, target: str, engine: str) -> str | None:
+        """Return a stored translation or None, updating the hit/miss counters."""
+        key = (text, source, target, engine)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.counters["lru_hits"] += 1
+                return self._lru[key]
+            row = self._conn.execute(
+                "SELECT translation FROM translations WHERE source_text = ? AND source_lang = ? "
+                "AND target_lang = ? AND engine = ?",
+                key,
+            ).fetchone()
+            if row:
+                self.counters["disk_hits"] += 1
+                self._remember(key, row[0])
+                return row[0]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, text: str, source: str, target: str, engine: str, translation: str) -> None:
+        key = (text, source, target, engine)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", (*key, translation)
+            )
+            self._conn.commit()
+            self._remember(key, translation)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+_memory = None
+_glossary = None
+_backends = {}
+_init_lock = threading.Lock()
+
+
+def get_memory() -> TranslationMemory:
+    """Process-wide translation memory, opened on first use."""
+    global _memory
+    with _init_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
+
+
+def get_glossary() -> dict:
+    """Built-in glossary plus TRANSLATION_GLOSSARY_PATH, keyed by lower-cased English term."""
+    global _glossary
+    with _init_lock:
+        if _glossary is None:
+            terms = dict(GLOSSARY)
+            if GLOSSARY_PATH and os.path.exists(GLOSSARY_PATH):
+                with open(GLOSSARY_PATH, newline="", encoding="utf-8-sig") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("english") and row.get("spanish"):
+                            terms[row["english"].strip()] = row["spanish"].strip()
+            _glossary = {k.lower(): v for k, v in terms.items()}
+        return _glossary
+
+
+def _pack_segments(segments: list[str], limit: int = BATCH_CHAR_LIMIT) -> list[list[str]]:
+    """Group single-line segments into newline-joined chunks of at most `limit` characters."""
+    chunks, current, size = [], [], 0
+    for seg in segments:
+        if current and size + len(seg) + 1 > limit:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(seg)
+        size += len(seg) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ---------------------------
+# BACKENDS
+# ---------------------------
+class TranslationBackend(ABC):
+    """Translation engine interface: translate a list of strings in as few calls as it allows."""
+
+    name = "base"
+
+    @abstractmethod
+    def translate_many(self, texts: list[str], source: str, target: str) -> list[str | None]:
+        """Return one translation per input, None where that string failed."""
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    Free Google endpoint through deep_translator. Single-line strings are packed one
+    per line into requests of at most BATCH_CHAR_LIMIT characters; multi-line strings
+    and chunks whose reply does not split back cleanly are sent one at a time.
+
+    `translator` may be any object with `translate(text) -> str` (e.g. a local stub).
+
+    The backend is shared by every session and worker thread, but a GoogleTranslator
+    keeps each request's text on the instance, so every thread gets its own clients.
+    """
+
+    name = "google"
+
+    def __init__(self, translator=None):
+        self._translator = translator
+        self._local = threading.local()
+
+    def _client(self, source: str, target: str):
+        if self._translator is not None:
+            return self._translator
+        clients = self._local.__dict__.setdefault("clients", {})
+        if (source, target) not in clients:
+            from deep_translator import GoogleTranslator
+            clients[(source, target)] = GoogleTranslator(source=source, target=target)
+        return clients[(source, target)]
+
+    def translate_many(self, texts, source, target):
+        client = self._client(source, target)
+        results = {}
+        single = [t for t in texts if "\n" in t or len(t) > BATCH_CHAR_LIMIT]
+        packable = [t for t in texts if "\n" not in t and len(t) <= BATCH_CHAR_LIMIT]
+
+        for chunk in _pack_segments(packable):
+            try:
+                lines = (client.translate("\n".join(chunk)) or "").split("\n")
+            except Exception as e:
+                print(f"[Translation error] {e}")
+                continue
+            if len(lines) != len(chunk):
+                single.extend(chunk)
+                continue
+            results.update((text, line.strip()) for text, line in zip(chunk, lines))
+
+        for text in single:
+            try:
+                results[text] = client.translate(text) or None
+            except Exception as e:
+                print(f"[Translation error] {e}")
+        return [results.get(t) for t in texts]
+
+
+class MarianBackend(TranslationBackend):
+    """Local CPU MarianMT model, loaded once per language pair and run in batches (works offline)."""
+
+    name = "marian"
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _load(self, source: str, target: str):
+        source = "en" if source == "auto" else source
+        model_name = MARIAN_MODEL if (source, target) == ("en", "es") else f"Helsinki-NLP/opus-mt-{source}-{target}"
+        with self._lock:
+            if model_name not in self._models:
+                from transformers import MarianMTModel, MarianTokenizer
+                tokenizer = MarianTokenizer.from_pretrained(model_name)
+                model = MarianMTModel.from_pretrained(model_name).eval()
+                self._models[model_name] = (tokenizer, model)
+            return self._models[model_name]
+
+    def translate_many(self, texts, source, target):
+        try:
+            import torch
+
+            tokenizer, model = self._load(source, target)
+        except Exception as e:
+            # transformers/torch missing, a failed download or no model for the pair: nothing is translated
+            print(f"[Translation error] MarianMT {source}->{target} unavailable: {e}")
+            return [None] * len(texts)
+        out = []
+        for i in range(0, len(texts), MARIAN_BATCH_SIZE):
+            batch = texts[i:i + MARIAN_BATCH_SIZE]
+            try:
+                with torch.no_grad():
+                    encoded = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+                    generated = model.generate(**encoded)
+                out.extend(tokenizer.batch_decode(generated, skip_special_tokens=True))
+            except Exception as e:
+                print(f"[Translation error] {e}")
+                out.extend([None] * len(batch))
+        return out
+
+
+class DeepLBackend(TranslationBackend):
+    """DeepL REST API (DEEPL_API_KEY); up to 50 segments per request."""
+
+    name = "deepl"
+
+    def translate_many(self, texts, source, target):
+        out = []
+        for i in range(0, len(texts), 50):
+            batch = texts[i:i + 50]
+            data = [("text", t) for t in batch] + [("target_lang", target.upper())]
+            if source != "auto":
+                data.append(("source_lang", source.upper()))
+            try:
+                r = requests.post(DEEPL_API_URL, data=data, timeout=60,
+                                  headers={"Authorization": f"DeepL-Auth-Key {DEEPL_API_KEY}"})
+                r.raise_for_status()
+                out.extend(t["text"] for t in r.json()["translations"])
+            except Exception as e:
+                print(f"[Translation error] {e}")
+                out.extend([None] * len(batch))
+        return out
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "marian": MarianBackend,
+    "deepl": DeepLBackend,
+}
+
+
+def get_backend(name: str | None = None) -> TranslationBackend:
+    """Shared backend instance for `name` (default TRANSLATION_ENGINE), so models load only once."""
+    name = (name or TRANSLATION_ENGINE).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation engine '{name}' (choose from {', '.join(BACKENDS)})")
+    with _init_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+# ---------------------------
+# PUBLIC API
+# ---------------------------
+def translation_stats() -> dict:
+    """Hit/miss counters of the translation memory for this process."""
+    return get_memory().stats()
+
+
+def translate_batch(texts, target_lang="es", source_lang="auto", translator=None, engine=None):
+    """
+    Translate many strings with as few engine calls as possible.
+
+    Inputs are deduplicated, then answered in layers: the glossary first (English →
+    Spanish only), then the translation memory, then one `translate_many` call on
+    the engine for whatever is left. Results are mapped back to the input positions;
+    strings that fail come back unchanged, like translate_text.
+
+    `engine` picks a backend by name (default TRANSLATION_ENGINE). `translator` is any
+    object with a `translate(text) -> str` method (e.g. a local stub in tests) and is
+    driven like the Google engine.
+    """
+    if translator is not None:
+        backend, engine_key = GoogleBackend(translator), type(translator).__name__
+    else:
+        backend = get_backend(engine)
+        engine_key = backend.name
+    memory = get_memory()
+    glossary = get_glossary() if target_lang == "es" and source_lang in ("auto", "en") else {}
+
+    done = {}
+    pending = []
+    for text in dict.fromkeys(t for t in texts if t and isinstance(t, str)):
+        term = glossary.get(text.strip().lower())
+        cached = term or memory.get(text, source_lang, target_lang, engine_key)
+        if cached is not None:
+            done[text] = cached
+        else:
+            pending.append(text)
+
+    if pending:
+        for text, result in zip(pending, backend.translate_many(pending, source_lang, target_lang)):
+            if result:
+                done[text] = result
+                memory.put(text, source_lang, target_lang, engine_key, result)
+
+    return [done.get(t, t) if t and isinstance(t, str) else "" for t in texts]
+
+
+def translate_text(text, target_lang="es", source_lang="auto", engine=None):
+    """
+    Translate text from English to the target language (default Spanish).
+    Goes through the glossary, the translation memory and the configured engine.
+    Falls back to returning the original text if translation fails.
+    """
+    if not text or not isinstance(text, str):
+        return ""
+    return translate_batch([text], target_lang, source_lang, engine=engine)[0]
@@ -0,0 +1,143 @@
+# utils/url_health.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import nullcontext
+
+import requests
+
+# One store shared by every checker on this machine (both Streamlit apps)
+URL_HEALTH_PATH = os.getenv(
+    "URL_HEALTH_PATH",
+    os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "url_health.sqlite3"),
+)
+URL_HEALTH_OK_TTL = int(os.getenv("URL_HEALTH_OK_TTL", str(7 * 24 * 3600)))  # seconds
+URL_HEALTH_FAIL_TTL = int(os.getenv("URL_HEALTH_FAIL_TTL", str(3600)))  # seconds
+
+# Answers that usually mean "HEAD not supported" rather than "link broken"
+HEAD_REJECTED = {400, 403, 405, 501}
+
+FIELDS = ("status", "final_url", "content_type", "content_length", "error", "checked_at", "details")
+
+
+def is_ok(result: dict) -> bool:
+    return isinstance(result.get("status"), int) and result["status"] < 400
+
+
+def is_healthy(result: dict) -> bool:
+    """The checker's verdict: an OK status, unless the checker marked the result failed in details["ok"]."""
+    return is_ok(result) and (result.get("details") or {}).get("ok", True) is not False
+
+
+class UrlHealthCache:
+    """
+    SQLite store of each checker's last result for each URL; healthy and failing results
+    expire on separate TTLs. Results are kept per checker ("link", "image", ...), so one
+    checker's verdict and details never stand in for another's.
+    """
+
+    def __init__(self, path: str = URL_HEALTH_PATH, ok_ttl: int = URL_HEALTH_OK_TTL,
+                 fail_ttl: int = URL_HEALTH_FAIL_TTL):
+        self.ok_ttl = ok_ttl
+        self.fail_ttl = fail_ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(url_health)")}
+        if columns and "checker" not in columns:  # stores keyed by URL alone; it's only a cache, so start over
+            self._conn.execute("DROP TABLE url_health")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS url_health (
+                checker        TEXT NOT NULL,
+                url            TEXT NOT NULL,
+                status         TEXT,
+                final_url      TEXT,
+                content_type   TEXT,
+                content_length INTEGER,
+                error          TEXT,
+                checked_at     REAL NOT NULL,
+                details        TEXT,
+                PRIMARY KEY (checker, url)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url: str, checker: str = "link") -> dict | None:
+        """`checker`'s cached result for `url`, or None if never checked or past its TTL."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM url_health WHERE checker = ? AND url = ?", (checker, url)
+            ).fetchone()
+        if not row:
+            return None
+        result = dict(zip(FIELDS, row))
+        if str(result["status"]).isdigit():
+            result["status"] = int(result["status"])
+        result["details"] = json.loads(result["details"] or "{}")
+        ttl = self.ok_ttl if is_healthy(result) else self.fail_ttl
+        return result if time.time() - result["checked_at"] < ttl else None
+
+    def put(self, url: str, result: dict, checker: str = "link") -> None:
+        """
+        Store `checker`'s result for `url`. `details` holds anything extra the checker wants
+        remembered; details["ok"] = False marks a failed verdict despite an OK status.
+        """
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO url_health (checker, url, {', '.join(FIELDS)}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (checker, url, str(result.get("status")), *(result.get(f) for f in FIELDS[1:-1]),
+                 json.dumps(result.get("details") or {}, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> UrlHealthCache:
+    """Process-wide cache at URL_HEALTH_PATH, opened on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = UrlHealthCache()
+        return _default_cache
+
+
+def probe(url: str, session=None, timeout: float = 10) -> dict:
+    """HEAD the URL (following redirects), retrying as a one-byte ranged GET if HEAD is rejected."""
+    http = session or requests
+    try:
+        r = http.head(url, allow_redirects=True, timeout=timeout)
+        if r.status_code in HEAD_REJECTED:
+            r = http.get(url, headers={"Range": "bytes=0-0"}, stream=True, allow_redirects=True, timeout=timeout)
+            r.close()
+        length = r.headers.get("Content-Length", "")
+        if r.status_code == 206:  # ranged GET: the full size is after the slash in Content-Range
+            length = r.headers.get("Content-Range", "").rpartition("/")[2]
+        return {"status": r.status_code, "final_url": r.url, "content_type": r.headers.get("Content-Type", ""),
+                "content_length": int(length) if length.isdigit() else None, "error": "",
+                "checked_at": time.time(), "details": {}}
+    except Exception as e:
+        return {"status": "Error", "final_url": "", "content_type": "", "content_length": None,
+                "error": str(e), "checked_at": time.time(), "details": {}}
+
+
+def check_url(url: str, session=None, timeout: float = 10, limit=None, cache: UrlHealthCache | None = None,
+              checker: str = "link") -> dict:
+    """
+    Cached probe of one URL. Only stale or unknown URLs hit the network, inside `limit`
+    (e.g. a per-host semaphore) when one is given.
+    """
+    cache = cache or default_cache()
+    result = cache.get(url, checker)
+    if result is None:
+        with limit or nullcontext():
+            result = probe(url, session, timeout)
+        cache.put(url, result, checker)
+    return result
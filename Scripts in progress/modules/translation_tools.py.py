@@ -1,11 +1,66 @@
 # modules/translation_tools.py
 from googletrans import Translator # pip install googletrans==4.0.0-rc1
-import time # Import time module
+
+BATCH_CHAR_LIMIT = 4500 # Stay under the ~5000 character limit of the free endpoint
+
+def translate_batch(texts, target_language="es", translator=None):
+    """
+    Translates a list of strings with as few requests as possible.
+
+    Duplicates are translated once, and single-line strings are packed one per line
+    into requests of at most BATCH_CHAR_LIMIT characters. If a reply does not split
+    back into the same number of lines, that chunk is retried one string at a time.
+
+    Args:
+        texts (list): Strings to translate.
+        target_language (str): The target language code ("es" or "en").
+        translator: Object with googletrans' translate(text, dest=...) interface
+            (a local stub can be passed for testing).
+
+    Returns:
+        dict: Original string -> translated string (failed strings are left out).
+    """
+    translator = translator or Translator()
+    unique = list(dict.fromkeys(t for t in texts if t and isinstance(t, str)))  # skips NaN and other non-text cells
+    single = [t for t in unique if "\n" in t or len(t) > BATCH_CHAR_LIMIT]
+    packable = [t for t in unique if "\n" not in t and len(t) <= BATCH_CHAR_LIMIT]
+    chunks, current, size = [], [], 0
+    for text in packable:
+        if current and size + len(text) + 1 > BATCH_CHAR_LIMIT:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text) + 1
+    if current:
+        chunks.append(current)
+
+    results = {}
+    for chunk in chunks:
+        try:
+            lines = translator.translate("\n".join(chunk), dest=target_language).text.split("\n")
+        except Exception as e:
+            print(f"Batch translation error: {e}") # Log errors
+            single.extend(chunk)
+            continue
+        if len(lines) != len(chunk):
+            single.extend(chunk)
+            continue
+        results.update((text, line.strip()) for text, line in zip(chunk, lines))
+
+    for text in single:
+        try:
+            results[text] = translator.translate(text, dest=target_language).text
+        except Exception as e:
+            print(f"Translation error for '{text}': {e}") # Log errors
+    return results
 
 def translate_data(data, target_language="es"):
     """
     Translates specified fields in the data using Google Translate.
 
+    All fields of all rows are collected first and translated together with
+    translate_batch, so a sheet costs a few requests instead of one per cell.
+
     Args:
         data (list): A list of dictionaries to translate.
         target_language (str): The target language code ("es" for Spanish, "en" for English).
@@ -13,34 +68,31 @@ def translate_data(data, target_language="es"):
     Returns:
         list: A list of dictionaries with translated fields.
     """
-    translator = Translator() # Initialize the translator here
+    # Fields to translate based on target language
+    if target_language == "es":
+        fields_to_translate = [("Description (EN)", "Description (ES)"),
+                              ("Tags (EN)", "Tags (ES)"),
+                              ("Relation", "Relación")] # Using tuples
+    elif target_language == "en":
+        fields_to_translate = [("Description (ES)", "Description (EN)"),
+                              ("Tags (ES)", "Tags (EN)"),
+                              ("Relación", "Relation")]
+    else:
+        print(f"Unsupported target language: {target_language}")
+        return data # Return original data if language is unsupported
+
+    texts = [row.get(source_field, "") for row in data for source_field, _ in fields_to_translate]
+    translations = translate_batch(texts, target_language)
+
     translated_data = []
     for row in data:
         translated_row = row.copy() # Create a copy to avoid modifying original
-        
-        # Fields to translate based on target language
-        if target_language == "es":
-            fields_to_translate = [("Description (EN)", "Description (ES)"),
-                                  ("Tags (EN)", "Tags (ES)"),
-                                  ("Relation", "Relación")] # Using tuples
-        elif target_language == "en":
-            fields_to_translate = [("Description (ES)", "Description (EN)"),
-                                  ("Tags (ES)", "Tags (EN)"),
-                                  ("Relación", "Relation")]
-        else:
-            print(f"Unsupported target language: {target_language}")
-            return data # Return original data if language is unsupported
-
         for source_field, dest_field in fields_to_translate:
             text_to_translate = translated_row.get(source_field, "") # Get text from source
-            if text_to_translate:
-                try:
-                    translation = translator.translate(text_to_translate, dest=target_language)
-                    translated_row[dest_field] = translation.text # Set translated text
-                    time.sleep(1)  # Be nice to the API - pause for 1 second
-                except Exception as e:
-                    print(f"Translation error for '{text_to_translate}': {e}") # Log errors
-                    translated_row[dest_field] = f"Translation Failed: {e}" # Set an error message
-
+            if text_to_translate and isinstance(text_to_translate, str):
+                if text_to_translate in translations:
+                    translated_row[dest_field] = translations[text_to_translate] # Set translated text
+                else:
+                    translated_row[dest_field] = "Translation Failed" # Set an error message
         translated_data.append(translated_row)
-    return translated_data
\ No newline at end of file
+    return translated_data
@@ -16,6 +16,7 @@ from tqdm import tqdm
 from html import unescape
 import time
 import json
+from worldcat_cache import fetch_bib  # local bib record store shared with the other tools
 
 # === USER CONFIGURATION ===
 WS_KEY = "YOUR_WS_KEY"
@@ -148,10 +149,7 @@ def get_oauth_token():
 def fetch_metadata_json(oclc_number, token):
     url = f"https://americas.discovery.api.oclc.org/worldcat/search/v2/bibs/{oclc_number}"
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    return None
+    return fetch_bib(oclc_number, lambda extra: requests.get(url, headers={**headers, **extra}))
 
 def parse_basic_record(json_data, oclc_number):
     record = {
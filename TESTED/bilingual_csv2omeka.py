@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 import os
-import requests
 import pandas as pd
 import json
-import time
 from urllib.parse import urljoin
+from omeka_uploader import upload_items as upload_payloads
 
 # 🔹 CONFIGURATION 🔹
 OMEKA_BASE_URL = "https://archivovenezuela.com/test/" 
@@ -15,6 +14,7 @@ CSV_FILE = r"C:\Users\.....\.......\Bilingual_metadata_template.csv" #Insert pat
 UPLOAD_LIMIT = 5  # Limit the number of items to upload (set to None for all rows)
 RETRY_ATTEMPTS = 3
 RETRY_DELAY = 2
+UPLOAD_WORKERS = 6  # Items uploaded in parallel
 
 # Element IDs for Dublin Core elements
 DC_ELEMENTS = {
@@ -73,27 +73,12 @@ def format_metadata(row, language="EN"):
             })
     return metadata
 
-# Create an item in Omeka
-def create_item(metadata):
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
-    params = {"key": API_KEY}
-    item_data = {
+# Build the Omeka item payload
+def item_payload(metadata):
+    return {
         "element_texts": metadata["element_texts"],
         "public": True
     }
-    for attempt in range(RETRY_ATTEMPTS):
-        try:
-            response = requests.post(OMEKA_API_URL, headers=headers, params=params, json=item_data)
-            if response.status_code == 201:
-                return response.json().get("id")
-            else:
-                log_message(f"Error creating item ({response.status_code}): {response.text}", "ERROR")
-                if attempt < RETRY_ATTEMPTS - 1:
-                    time.sleep(RETRY_DELAY)
-        except Exception as e:
-            log_message(f"Exception on item creation: {e}", "ERROR")
-            time.sleep(RETRY_DELAY)
-    return None
 
 # Read CSV file
 def read_csv(path):
@@ -116,17 +101,24 @@ def upload_items(language="EN"):
         data = data[:UPLOAD_LIMIT]
         log_message(f"Uploading first {UPLOAD_LIMIT} items")
 
-    successful_uploads = 0
+    payloads = []
     for index, row in enumerate(data):
-        log_message(f"📄 Processing item {index+1}/{len(data)}")
         metadata = format_metadata(row, language)
         if not metadata["element_texts"]:
-            log_message("⚠️ No valid metadata found. Skipping.", "WARNING")
+            log_message(f"⚠️ Item {index+1}: no valid metadata found. Skipping.", "WARNING")
             continue
+        payloads.append(item_payload(metadata))
 
-        item_id = create_item(metadata)
-        if item_id:
+    # Upload concurrently over one pooled connection; results print as each item finishes
+    successful_uploads = 0
+    results = upload_payloads(payloads, OMEKA_API_URL, API_KEY, max_workers=UPLOAD_WORKERS,
+                              retries=RETRY_ATTEMPTS - 1, backoff=RETRY_DELAY)
+    for done, result in enumerate(results, start=1):
+        if result["id"]:
             successful_uploads += 1
+            log_message(f"📄 [{done}/{len(payloads)}] Created item {result['id']}", "SUCCESS")
+        else:
+            log_message(f"[{done}/{len(payloads)}] Error creating item ({result['status']}): {result['text']}", "ERROR")
 
     log_message(f"✅ ✅ Upload complete: {successful_uploads} of {len(data)} items for {language} site")
 
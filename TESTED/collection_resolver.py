@@ -0,0 +1,58 @@
+# collection_resolver.py
+import re
+import threading
+
+import requests
+
+
+def normalize_title(title):
+    """Case- and whitespace-insensitive form of a collection title."""
+    return re.sub(r"\s+", " ", str(title or "")).strip().casefold()
+
+
+class CollectionResolver:
+    """
+    Collection title → id lookups for one upload run.
+
+    All collections are listed once (every page) on first use; titles missing
+    from that index are created through `create(name)` exactly once, even when
+    several upload threads ask for the same new collection at the same time.
+    """
+
+    def __init__(self, collections_url, api_key, create, per_page=100):
+        self.collections_url = collections_url
+        self.api_key = api_key
+        self.create = create
+        self.per_page = per_page
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        index = {}
+        page = 1
+        while True:
+            r = requests.get(self.collections_url, params={"key": self.api_key, "per_page": self.per_page,
+                                                          "page": page}, timeout=30)
+            r.raise_for_status()
+            batch = r.json()
+            if not batch:
+                return index
+            for collection in batch:
+                for text in collection.get("element_texts", []):
+                    if text.get("element", {}).get("name") == "Title":
+                        index.setdefault(normalize_title(text.get("text")), collection.get("id"))
+            page += 1
+
+    def resolve(self, name):
+        key = normalize_title(name)
+        if not key:
+            return None
+        with self._lock:
+            if self._index is None:
+                self._index = self._load()
+            if key not in self._index:
+                collection_id = self.create(str(name).strip())
+                if not collection_id:
+                    return None  # not cached, so a later row can retry
+                self._index[key] = collection_id
+            return self._index[key]
@@ -8,6 +8,7 @@ import requests
 import csv
 from tqdm import tqdm
 import os
+from worldcat_cache import fetch_bib  # local bib record store shared with the other tools
 
 # === USER CONFIGURATION ===
 WS_KEY = "YOUR_WS_KEY"
@@ -34,8 +35,7 @@ def get_oauth_token():
 def fetch_json(oclc_number, token):
     url = f"https://americas.discovery.api.oclc.org/worldcat/search/v2/bibs/{oclc_number}"
     headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(url, headers=headers)
-    return resp.json() if resp.status_code == 200 else None
+    return fetch_bib(oclc_number, lambda extra: requests.get(url, headers={**headers, **extra}))
 
 def extract_identifiers(json_data):
     isbn_list = []
@@ -0,0 +1,128 @@
+# omeka_uploader.py
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upload concurrency: items in flight overall / per Omeka host
+UPLOAD_MAX_WORKERS = int(os.getenv("OMEKA_UPLOAD_WORKERS", "6"))
+UPLOAD_PER_HOST = int(os.getenv("OMEKA_UPLOAD_PER_HOST", "4"))
+UPLOAD_MAX_RETRIES = int(os.getenv("OMEKA_UPLOAD_RETRIES", "4"))
+UPLOAD_BACKOFF = float(os.getenv("OMEKA_UPLOAD_BACKOFF", "1.0"))  # seconds, doubled per attempt
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A POST may already have created the item when it timed out or got a 5xx; only these
+# answers (and failures to connect at all) say it was never processed, so only they are resent
+POST_RETRY_STATUSES = {429, 503}
+POST_RETRY_ERRORS = (requests.ConnectionError, requests.ConnectTimeout)
+
+_host_limits = {}
+_host_lock = threading.Lock()
+
+
+def _host_limit(url: str, per_host: int) -> threading.BoundedSemaphore:
+    """Semaphore shared by every upload to the same host."""
+    key = (urlparse(url).netloc, per_host)
+    with _host_lock:
+        if key not in _host_limits:
+            _host_limits[key] = threading.BoundedSemaphore(max(1, per_host))
+        return _host_limits[key]
+
+
+def make_session(pool_size: int = UPLOAD_MAX_WORKERS) -> requests.Session:
+    """requests.Session whose connection pool can keep one TLS connection per worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_delay(resp, attempt: int, backoff: float) -> float:
+    """Retry-After when the server sends one, otherwise exponential backoff with full jitter."""
+    retry_after = resp.headers.get("Retry-After", "") if resp is not None else ""
+    if retry_after.isdigit():
+        return float(retry_after)
+    return random.uniform(0, backoff * 2 ** attempt)
+
+
+def send_with_retry(session, method: str, url: str, payload: dict, params=None,
+                    retries: int = UPLOAD_MAX_RETRIES, backoff: float = UPLOAD_BACKOFF,
+                    per_host: int = UPLOAD_PER_HOST) -> requests.Response:
+    """
+    POST/PUT one JSON payload. PUTs retry 429/5xx answers and request errors; POSTs,
+    which are not idempotent, retry only 429/503 and connection failures, so a retry
+    can never create the same item twice.
+    Returns the last response; raises the last exception if no response was ever received.
+    """
+    limit = _host_limit(url, per_host)
+    is_post = method.upper() == "POST"
+    retry_statuses = POST_RETRY_STATUSES if is_post else RETRY_STATUSES
+    retry_errors = POST_RETRY_ERRORS if is_post else (requests.RequestException,)
+    resp, error = None, None
+    for attempt in range(retries + 1):
+        try:
+            with limit:
+                resp = session.request(method, url, params=params, json=payload,
+                                       headers={"Accept": "application/json"}, timeout=60)
+            error = None
+            if resp.status_code not in retry_statuses:
+                return resp
+        except retry_errors as e:
+            resp, error = None, e
+        if attempt < retries:
+            time.sleep(_retry_delay(resp, attempt, backoff))
+    if error is not None:
+        raise error
+    return resp
+
+
+def upload_items(payloads: list[dict], api_url: str, api_key: str | None = None,
+                 max_workers: int = UPLOAD_MAX_WORKERS, per_host: int = UPLOAD_PER_HOST,
+                 session=None, item_ids: list | None = None,
+                 retries: int = UPLOAD_MAX_RETRIES, backoff: float = UPLOAD_BACKOFF):
+    """
+    Create Omeka items concurrently over one pooled session.
+
+    `item_ids`, when given, lines up with `payloads`: a payload with an id is PUT to
+    that existing item instead of being POSTed as a new one.
+
+    Yields one result per payload as it finishes (completion order, not input order):
+    {"index", "status", "id", "text"} where `index` is the payload's position,
+    `status` the HTTP status (None on connection failure) and `id` the new item id.
+    """
+    params = {"key": api_key} if api_key else None
+    own_session = session is None
+    session = session or make_session(max_workers)
+
+    item_ids = item_ids or [None] * len(payloads)
+
+    def send(payload, item_id):
+        if item_id:
+            return send_with_retry(session, "PUT", f"{api_url.rstrip('/')}/{item_id}", payload,
+                                   params=params, retries=retries, backoff=backoff, per_host=per_host)
+        return send_with_retry(session, "POST", api_url, payload, params=params,
+                               retries=retries, backoff=backoff, per_host=per_host)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(send, payload, item_id): i
+                       for i, (payload, item_id) in enumerate(zip(payloads, item_ids))}
+            for future in as_completed(futures):
+                result = {"index": futures[future], "status": None, "id": None, "text": ""}
+                try:
+                    resp = future.result()
+                    result["status"], result["text"] = resp.status_code, resp.text
+                    if resp.status_code in (200, 201):
+                        result["id"] = resp.json().get("id")
+                except Exception as e:
+                    result["text"] = str(e)
+                yield result
+    finally:
+        if own_session:
+            session.close()
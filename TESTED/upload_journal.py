@@ -0,0 +1,93 @@
+# upload_journal.py
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+# One journal per Omeka site, kept next to the other local stores
+JOURNAL_DIR = os.getenv(
+    "UPLOAD_JOURNAL_DIR", os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "upload_journals")
+)
+
+# Columns that identify a CSV row across re-runs (first non-empty one wins)
+KEY_FIELDS = ("Identifier", "OCLC Number", "oclc")
+
+
+def fingerprint(payload: dict) -> str:
+    """Stable hash of an Omeka payload; changes whenever the row's uploaded content changes."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def row_key(row: dict, payload: dict, key_fields=KEY_FIELDS) -> str:
+    """Identity of a row: its identifier column if it has one, otherwise its content."""
+    for field in key_fields:
+        value = str(row.get(field, "") or "").strip()
+        if value and value.lower() not in ("nan", "none"):
+            return f"{field}:{value}"
+    return f"content:{fingerprint(payload)}"
+
+
+class UploadJournal:
+    """
+    Append-only JSONL log of uploads: row key, content fingerprint, Omeka id, status.
+
+    Every outcome is appended (and flushed) as soon as it is known, so a crashed
+    import can be re-run: rows already uploaded with the same content are skipped,
+    rows whose content changed are updated in place instead of created again.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = {}  # row key → last successful entry
+        self._torn = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._torn = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    if entry.get("status") in ("created", "updated"):
+                        self._done[entry["key"]] = entry
+
+    def plan(self, key: str, fp: str) -> tuple[str, int | None]:
+        """("skip", id), ("update", id) or ("create", None) for a row about to be uploaded."""
+        with self._lock:
+            entry = self._done.get(key)
+        if not entry:
+            return "create", None
+        if entry["fingerprint"] == fp:
+            return "skip", entry["omeka_id"]
+        return "update", entry["omeka_id"]
+
+    def record(self, key: str, fp: str, omeka_id: int | None, status: str) -> None:
+        """Append one outcome ("created", "updated" or "failed")."""
+        entry = {"key": key, "fingerprint": fp, "omeka_id": omeka_id, "status": status, "at": time.time()}
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn:
+                    f.write("\n")  # keep a half-written line from a crash on its own
+                    self._torn = False
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status in ("created", "updated"):
+                self._done[key] = entry
+
+
+def journal_path(api_url: str) -> str:
+    """Journal file for a site's items endpoint."""
+    site = re.sub(r"/api/items/?$", "", str(api_url).split("://", 1)[-1])
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", site).strip("_") or "omeka"
+    return os.path.join(JOURNAL_DIR, f"{slug}.jsonl")
+
+
+def open_journal(api_url: str) -> UploadJournal:
+    return UploadJournal(journal_path(api_url))
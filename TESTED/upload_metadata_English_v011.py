@@ -2,6 +2,8 @@ import os
 import requests
 import pandas as pd
 from urllib.parse import urljoin
+from collection_resolver import CollectionResolver
+from upload_journal import UploadJournal, fingerprint, open_journal, row_key
 
 # 🔧 Configuration
 OMEKA_BASE_URL = "https://archivovenezuela.com/en/"
@@ -10,6 +12,7 @@ OMEKA_COLLECTIONS_URL = urljoin(OMEKA_BASE_URL, "api/collections")
 API_KEY = "YOUR_API_KEY_HERE"
 CSV_FILE = "PATH_TO_YOUR_CSV_FILE"
 UPLOAD_LIMIT = 5
+JOURNAL_FILE = None  # Upload journal; None = ~/.archivo_venezuela/upload_journals/<site>.jsonl
 
 # 🏷️ Dublin Core Elements
 DC_ELEMENTS = {
@@ -74,16 +77,16 @@ def format_metadata(row):
             })
     return metadata
 
+_collections = None
+
 def get_collection_id(name):
+    global _collections
     if not name:
         return None
     try:
-        r = requests.get(OMEKA_COLLECTIONS_URL, params={"key": API_KEY})
-        for col in r.json():
-            for text in col.get("element_texts", []):
-                if text.get("element", {}).get("name") == "Title" and text.get("text", "").strip().lower() == name.strip().lower():
-                    return col.get("id")
-        return create_collection(name)
+        # Collections are listed once per run; missing ones are created once
+        _collections = _collections or CollectionResolver(OMEKA_COLLECTIONS_URL, API_KEY, create_collection)
+        return _collections.resolve(name)
     except Exception as e:
         log_message(f"Collection fetch failed: {str(e)}", "ERROR")
         return None
@@ -110,7 +113,7 @@ def create_collection(name):
         log_message(f"Error creating collection: {str(e)}", "ERROR")
     return None
 
-def create_item(metadata, collection_id=None, tags=None):
+def build_item(metadata, collection_id=None, tags=None):
     item = {
         "element_texts": metadata["element_texts"],
         "public": True
@@ -119,6 +122,9 @@ def create_item(metadata, collection_id=None, tags=None):
         item["collection"] = {"id": collection_id}
     if tags:
         item["tags"] = tags
+    return item
+
+def create_item(item):
     try:
         r = requests.post(OMEKA_API_URL, json=item, params={"key": API_KEY})
         if r.status_code == 201:
@@ -130,12 +136,25 @@ def create_item(metadata, collection_id=None, tags=None):
         log_message(f"Request failed: {str(e)}", "ERROR")
     return None
 
+def update_item(item_id, item):
+    try:
+        r = requests.put(f"{OMEKA_API_URL}/{item_id}", json=item, params={"key": API_KEY})
+        if r.status_code == 200:
+            log_message(f"✅ Item {item_id} updated", "SUCCESS")
+            return item_id
+        else:
+            log_message(f"❌ Failed to update item {item_id}: {r.status_code} {r.text}", "ERROR")
+    except Exception as e:
+        log_message(f"Request failed: {str(e)}", "ERROR")
+    return None
+
 def upload_items():
     log_message("🚀 Starting batch upload process")
     data = read_csv(CSV_FILE)
     if UPLOAD_LIMIT:
         data = data[:UPLOAD_LIMIT]
         log_message(f"Uploading first {UPLOAD_LIMIT} items")
+    journal = UploadJournal(JOURNAL_FILE) if JOURNAL_FILE else open_journal(OMEKA_API_URL)
     success = 0
     for index, row in enumerate(data):
         log_message(f"📄 Processing item {index+1}/{len(data)}")
@@ -153,7 +172,21 @@ def upload_items():
             if tag_field in row and row[tag_field]:
                 tags = parse_tags(row[tag_field])
                 break
-        item_id = create_item(metadata, collection_id, tags)
+        item = build_item(metadata, collection_id, tags)
+
+        # Resume support: skip rows already uploaded unchanged, update rows that changed
+        key, fp = row_key(row, item), fingerprint(item)
+        action, existing_id = journal.plan(key, fp)
+        if action == "skip":
+            log_message(f"⏭️ Already uploaded as item {existing_id}. Skipping.")
+            success += 1
+            continue
+        if action == "update":
+            item_id = update_item(existing_id, item)
+            journal.record(key, fp, existing_id, "updated" if item_id else "failed")
+        else:
+            item_id = create_item(item)
+            journal.record(key, fp, item_id, "created" if item_id else "failed")
         if item_id:
             success += 1
     log_message(f"✅ Upload complete: {success} of {len(data)} items")
@@ -5,6 +5,8 @@ import pandas as pd
 import json
 import time
 from urllib.parse import urljoin
+from collection_resolver import CollectionResolver
+from upload_journal import UploadJournal, fingerprint, open_journal, row_key
 
 # 🔹 CONFIGURACIÓN 🔹
 DEBUG = True
@@ -16,6 +18,7 @@ CSV_FILE = "PATH_TO_YOUR_CSV_FILE"
 UPLOAD_LIMIT = 5
 RETRY_ATTEMPTS = 3
 RETRY_DELAY = 2
+JOURNAL_FILE = None  # Registro de subidas; None = ~/.archivo_venezuela/upload_journals/<sitio>.jsonl
 
 # Element ID mapping for Dublin Core
 DC_ELEMENTS = {
@@ -59,18 +62,16 @@ def parse_tags(tags_string):
             return [tag.strip() for tag in tags_string.split(sep) if tag.strip()]
     return [tag.strip() for tag in tags_string.split() if tag.strip()]
 
+_collections = None
+
 def get_collection_id(collection_name):
+    global _collections
     if not collection_name:
         return None
-    params = {"key": API_KEY}
     try:
-        response = requests.get(OMEKA_COLLECTIONS_URL, params=params, timeout=30)
-        if response.status_code == 200:
-            for collection in response.json():
-                for element in collection.get("element_texts", []):
-                    if element.get("element", {}).get("name") == "Title" and element.get("text", "").lower() == collection_name.lower():
-                        return collection["id"]
-        return create_collection(collection_name)
+        # Las colecciones se listan una sola vez; las que faltan se crean una sola vez
+        _collections = _collections or CollectionResolver(OMEKA_COLLECTIONS_URL, API_KEY, create_collection)
+        return _collections.resolve(collection_name)
     except Exception as e:
         log_message(f"Error getting collection: {e}", "ERROR")
         return None
@@ -112,9 +113,7 @@ def format_metadata(row):
             })
     return metadata
 
-def create_item(metadata, collection_id=None, tags=None, private_notes=None):
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
-    params = {"key": API_KEY}
+def build_item(metadata, collection_id=None, tags=None, private_notes=None):
     item_data = {
         "element_texts": metadata["element_texts"],
         "public": True
@@ -129,17 +128,28 @@ def create_item(metadata, collection_id=None, tags=None, private_notes=None):
             "text": private_notes,
             "html": True
         })
+    return item_data
+
+def create_item(item_data):
+    return send_item("POST", OMEKA_API_URL, item_data, 201)
+
+def update_item(item_id, item_data):
+    return send_item("PUT", f"{OMEKA_API_URL}/{item_id}", item_data, 200)
+
+def send_item(method, url, item_data, expected_status):
+    headers = {"Accept": "application/json", "Content-Type": "application/json"}
+    params = {"key": API_KEY}
     for attempt in range(RETRY_ATTEMPTS):
         try:
-            response = requests.post(OMEKA_API_URL, headers=headers, params=params, json=item_data)
-            if response.status_code == 201:
+            response = requests.request(method, url, headers=headers, params=params, json=item_data)
+            if response.status_code == expected_status:
                 return response.json().get("id")
             else:
-                log_message(f"Error creating item ({response.status_code}): {response.text}", "ERROR")
+                log_message(f"Error saving item ({response.status_code}): {response.text}", "ERROR")
                 if attempt < RETRY_ATTEMPTS - 1:
                     time.sleep(RETRY_DELAY)
         except Exception as e:
-            log_message(f"Exception on item creation: {e}", "ERROR")
+            log_message(f"Exception on item save: {e}", "ERROR")
             time.sleep(RETRY_DELAY)
     return None
 
@@ -162,6 +172,7 @@ def upload_items():
         data = data[:UPLOAD_LIMIT]
         log_message(f"Uploading first {UPLOAD_LIMIT} items")
 
+    journal = UploadJournal(JOURNAL_FILE) if JOURNAL_FILE else open_journal(OMEKA_API_URL)
     successful_uploads = 0
     for index, row in enumerate(data):
         log_message(f"📄 Processing item {index+1}/{len(data)}")
@@ -184,7 +195,21 @@ def upload_items():
 
         private_notes = row.get("Notes", "").strip()
 
-        item_id = create_item(metadata, collection_id, tags, private_notes)
+        item_data = build_item(metadata, collection_id, tags, private_notes)
+
+        # Reanudación: omite filas ya subidas sin cambios y actualiza las que cambiaron
+        key, fp = row_key(row, item_data), fingerprint(item_data)
+        action, existing_id = journal.plan(key, fp)
+        if action == "skip":
+            log_message(f"⏭️ Already uploaded as item {existing_id}. Skipping.")
+            successful_uploads += 1
+            continue
+        if action == "update":
+            item_id = update_item(existing_id, item_data)
+            journal.record(key, fp, existing_id, "updated" if item_id else "failed")
+        else:
+            item_id = create_item(item_data)
+            journal.record(key, fp, item_id, "created" if item_id else "failed")
         if item_id:
             successful_uploads += 1
 
@@ -3,6 +3,8 @@ import csv
 import json
 import time
 
+from worldcat_cache import fetch_bib  # local bib record store shared with the other tools
+
 try:
     import requests
 except ImportError:
@@ -56,13 +58,17 @@ def fetch_worldcat_data(oclc_number, token):
     }
     api_url = f'https://americas.discovery.api.oclc.org/worldcat/search/v2/bibs/{oclc_number}'
 
-    response = requests.get(api_url, headers=headers)
-    if response.status_code == 200:
-        print(f"✅ Datos obtenidos para OCLC {oclc_number}: {response.json()}")  # Debugging
-        return response.json()
-    else:
-        print(f"❌ Error al obtener datos para OCLC {oclc_number}: {response.text}")
-        return None
+    def do_get(extra_headers):
+        # Pausa solo antes de peticiones reales para no exceder el límite de la API
+        time.sleep(1)
+        response = requests.get(api_url, headers={**headers, **extra_headers})
+        if response.status_code == 200:
+            print(f"✅ Datos obtenidos para OCLC {oclc_number}: {response.json()}")  # Debugging
+        elif response.status_code != 304:
+            print(f"❌ Error al obtener datos para OCLC {oclc_number}: {response.text}")
+        return response
+
+    return fetch_bib(oclc_number, do_get)
 
 def clean_worldcat_data(worldcat_data):
     def get_nested(data, keys, default=""):
@@ -181,9 +187,6 @@ def batch_import_to_csv(oclc_numbers, token):
         else:
             print(f"⚠️ Saltando OCLC: {oclc}, datos no encontrados.")
 
-        # Add a delay to avoid hitting API rate limits
-        time.sleep(1)
-
     if all_data:
         write_to_csv(all_data, CSV_FILE_PATH)
     else:
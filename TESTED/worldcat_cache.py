@@ -0,0 +1,120 @@
+# worldcat_cache.py
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# One store shared by every tool on this machine (Streamlit apps and TESTED scripts)
+CACHE_PATH = os.getenv(
+    "WORLDCAT_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "worldcat_cache.sqlite3"),
+)
+CACHE_TTL = int(os.getenv("WORLDCAT_CACHE_TTL", str(30 * 24 * 3600)))  # seconds
+
+
+class WorldCatCache:
+    """SQLite store of raw WorldCat bib JSON keyed by OCLC number."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL):
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bibs (
+                oclc_number   TEXT PRIMARY KEY,
+                body          TEXT NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                fetched_at    REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, oclc_number: str) -> dict | None:
+        """Return {"data", "etag", "last_modified", "fetched_at", "fresh"} or None if never fetched."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM bibs WHERE oclc_number = ?",
+                (str(oclc_number),),
+            ).fetchone()
+        if not row:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return {
+            "data": json.loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "fresh": time.time() - fetched_at < self.ttl,
+        }
+
+    def put(self, oclc_number: str, data: dict, headers=None) -> None:
+        """Store a freshly downloaded record with its validators."""
+        headers = headers or {}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bibs (oclc_number, body, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(oclc_number), json.dumps(data, ensure_ascii=False),
+                 headers.get("ETag"), headers.get("Last-Modified"), time.time()),
+            )
+            self._conn.commit()
+
+    def touch(self, oclc_number: str) -> None:
+        """Mark a stale record as fresh again after a 304 Not Modified."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bibs SET fetched_at = ? WHERE oclc_number = ?", (time.time(), str(oclc_number))
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict:
+        """Revalidation headers for a stale entry (empty when there is nothing cached)."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> WorldCatCache:
+    """Process-wide cache at CACHE_PATH, opened on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = WorldCatCache()
+        return _default_cache
+
+
+def fetch_bib(oclc_number: str, do_get, cache: WorldCatCache | None = None) -> dict | None:
+    """
+    Return the bib JSON for `oclc_number`, going to the network only when needed.
+
+    `do_get(headers)` performs the GET with the given extra headers and returns the
+    response. Fresh entries are answered from the cache; stale ones are revalidated
+    with If-None-Match / If-Modified-Since and a 304 only renews the timestamp.
+    """
+    cache = cache or default_cache()
+    entry = cache.get(oclc_number)
+    if entry and entry["fresh"]:
+        return entry["data"]
+
+    resp = do_get(cache.conditional_headers(entry))
+    if resp.status_code == 304 and entry:
+        cache.touch(oclc_number)
+        return entry["data"]
+    if resp.status_code == 200:
+        data = resp.json()
+        cache.put(oclc_number, data, resp.headers)
+        return data
+    return None
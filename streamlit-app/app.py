@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from utils.fetch_helpers import fetch_metadata_from_csv
+from utils.translation import translation_stats
 
 
 import os
@@ -72,15 +73,26 @@ if uploaded_file:
         # FETCH BUTTON
         # ----------------------------------
         if st.button("🚀 Fetch Metadata from WorldCat"):
+            progress_bar = st.progress(0)
             with st.spinner("Fetching metadata... please wait ⏳"):
                 try:
-                    result_df = fetch_metadata_from_csv(df)
+                    result_df = fetch_metadata_from_csv(
+                        df, progress=lambda done, total: progress_bar.progress(done / total)
+                    )
                     st.session_state["result_df"] = result_df
 
                 except Exception as e:
                     st.error(f"Error: {e}")
                     st.stop()
 
+            failures = result_df.attrs.get("failures", [])
+            if failures:
+                st.warning(f"⚠️ {len(failures)} OCLC numbers could not be fetched.")
+                st.dataframe(pd.DataFrame(failures), use_container_width=True)
+
+            tm = translation_stats()
+            st.caption(f"🧠 Translation memory: {tm['lru_hits'] + tm['disk_hits']} hits, {tm['misses']} misses")
+
             if not result_df.empty:
                 st.success("✅ Metadata fetched successfully!")
                 st.dataframe(result_df, use_container_width=True)
@@ -101,7 +113,7 @@ else:
 # ----------------------------------
 # STEP 2 — UPLOAD TO OMEKA
 # ----------------------------------
-from utils.omeka_api import upload_item_to_omeka
+from utils.omeka_api import upload_rows_to_omeka
 
 st.subheader("📤 Step 2 — Upload Metadata to Omeka")
 
@@ -110,18 +122,24 @@ result_df = st.session_state.get("result_df", None)
 
 if result_df is not None and not result_df.empty:
     if st.button("📤 Upload to Omeka"):
-        success, failed = [], []
-
-        with st.spinner("Uploading items to Omeka..."):
-            for i, row in result_df.iterrows():
-                status, msg = upload_item_to_omeka(row)
-                title = row.get("Title (English)") or f"Item {i + 1}"
-                if status == 201:
-                    success.append(title)
-                else:
-                    failed.append(f"{title} ({status})")
+        success, skipped, failed = [], [], []
+        rows = result_df.to_dict(orient="records")
+        progress = st.progress(0.0, text="Uploading items to Omeka...")
+
+        for done, result in enumerate(upload_rows_to_omeka(rows), start=1):
+            i = result["index"]
+            title = rows[i].get("Title (English)") or f"Item {i + 1}"
+            if result["status"] == "skipped":
+                skipped.append(title)
+            elif result["id"]:
+                success.append(title)
+            else:
+                failed.append(f"{title} ({result['status']})")
+            progress.progress(done / len(rows), text=f"Uploaded {done}/{len(rows)} — {title}")
 
         st.success(f"✅ Uploaded {len(success)} items successfully.")
+        if skipped:
+            st.info(f"⏭️ Skipped {len(skipped)} items already uploaded with the same content.")
         if failed:
             st.warning(f"⚠️ Failed uploads: {', '.join(failed)}")
 else:
@@ -130,7 +148,12 @@ else:
 # ----------------------------------
 # STEP 3 — SEMANTIC FAST SUBJECT ENRICHMENT
 # ----------------------------------
-from utils.fast_semantic_enrichment import enrich_with_fast_semantic
+# get_kw_model() is the shared model: loaded once per process, on the first enrichment, and reused by every session
+from utils.fast_semantic_enrichment import enrich_with_fast_semantic, get_kw_model, warm_up
+
+# Optional: start loading the model in the background as soon as the app starts
+if os.getenv("FAST_ENRICH_WARMUP", "").strip().lower() in ("1", "true", "yes"):
+    warm_up()
 
 st.subheader("📚 Step 3 — FAST Subject Enrichment (Semantic + AI)")
 
@@ -145,9 +168,11 @@ if result_df is not None and not result_df.empty:
     if st.button("🚀 Semantic FAST Enrichment"):
         with st.spinner("Analyzing themes and enriching subjects..."):
             try:
+                get_kw_model()  # a missing keybert fails here, into the st.error below
                 enriched_df = enrich_with_fast_semantic(result_df)
                 st.session_state["fast_df"] = enriched_df
-                st.success(f"✅ Enriched {len(enriched_df)} records with semantic FAST subjects.")
+                st.success(f"✅ Enriched {len(enriched_df)} records with semantic FAST subjects "
+                           f"({enriched_df.attrs.get('docs_per_sec', 0):.1f} docs/sec).")
                 st.dataframe(enriched_df, use_container_width=True)
 
                 csv_data = enriched_df.to_csv(index=False).encode("utf-8-sig")
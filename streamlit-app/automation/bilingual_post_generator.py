@@ -1,12 +1,10 @@
 import random
-from googletrans import Translator
-
-translator = Translator()
+from utils.translation import translate_batch
 
 def generate_bilingual_caption(title, creator, description, tags):
     """
     Generate simple bilingual social media captions (EN + ES)
-    using free Google Translate and consistent templates.
+    using the configured translation engine (utils/translation.py) and consistent templates.
     """
 
     # Basic cleanups
@@ -23,18 +21,11 @@ def generate_bilingual_caption(title, creator, description, tags):
     ]
     caption_en = random.choice(templates_en)
 
-    # --- Spanish Caption (translated) ---
-    try:
-        translated_caption = translator.translate(caption_en, src="en", dest="es").text
-    except Exception:
+    # --- Spanish Caption + Hashtags (translated together) ---
+    translated_caption, hashtags_es = translate_batch([caption_en, hashtags], source_lang="en")
+    if translated_caption == caption_en:  # translation failed
         translated_caption = f"Descubre {title} de {creator}, ahora en el archivo. {description}"
 
-    # --- Hashtags (auto-translated too) ---
-    try:
-        hashtags_es = translator.translate(hashtags, src="en", dest="es").text
-    except Exception:
-        hashtags_es = hashtags
-
     return {
         "Caption_EN": caption_en,
         "Caption_ES": translated_caption,
@@ -4,10 +4,12 @@ import json
 import time
 import re
 from html import unescape
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 
@@ -15,6 +17,7 @@ OMEKA_API_URL = os.getenv("OMEKA_API_URL", "https://archivovenezuela.com/test/ap
 OMEKA_API_KEY = os.getenv("OMEKA_API_KEY", "")
 
 PER_PAGE_DEFAULT = int(os.getenv("OMEKA_PER_PAGE", "50"))
+FILES_MAX_WORKERS = int(os.getenv("OMEKA_FILES_WORKERS", "8"))  # parallel /files requests per page
 
 def clean_html(raw_html: str) -> str:
     if not raw_html:
@@ -37,11 +40,14 @@ def get_files_url_from_item(item: dict) -> str | None:
         return files_obj.get("url")
     return None
 
-def fetch_item_detail(item_id: int) -> dict | None:
+def _key_params() -> dict:
+    return {"key": OMEKA_API_KEY} if OMEKA_API_KEY else {}
+
+def fetch_item_detail(item_id: int, session=None) -> dict | None:
     try:
-        r = requests.get(
+        r = (session or requests).get(
             f"{OMEKA_API_URL.rstrip('/')}/{item_id}",
-            params={"key": OMEKA_API_KEY} if OMEKA_API_KEY else {},
+            params=_key_params(),
             timeout=20,
         )
         if r.status_code == 200:
@@ -50,7 +56,7 @@ def fetch_item_detail(item_id: int) -> dict | None:
         pass
     return None
 
-def fetch_item_files(item: dict) -> list[str]:
+def fetch_item_files(item: dict, session=None) -> list[str]:
     """Return list of original image URLs for this item using files endpoint."""
     files_url = get_files_url_from_item(item)
     if not files_url:
@@ -58,7 +64,7 @@ def fetch_item_files(item: dict) -> list[str]:
         base = OMEKA_API_URL.replace("/items", "/files")
         files_url = f"{base}?item={item.get('id')}"
     try:
-        r = requests.get(files_url, params={"key": OMEKA_API_KEY} if OMEKA_API_KEY else {}, timeout=20)
+        r = (session or requests).get(files_url, params=_key_params(), timeout=20)
         if r.status_code == 200:
             urls = []
             for f in r.json():
@@ -70,18 +76,78 @@ def fetch_item_files(item: dict) -> list[str]:
         pass
     return []
 
+def _file_count(item: dict) -> int | None:
+    """Number of files the list payload reports for an item (None if it doesn't say)."""
+    files_obj = item.get("files")
+    if isinstance(files_obj, dict) and isinstance(files_obj.get("count"), int):
+        return files_obj["count"]
+    return None
+
+def fetch_page_files(items: list[dict], session=None) -> dict:
+    """
+    Fetch file URLs for a whole page at once: items whose list payload reports
+    zero files are skipped, the rest are requested in parallel.
+    """
+    wanted = [it for it in items if _file_count(it) != 0]
+    if not wanted:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, FILES_MAX_WORKERS)) as pool:
+        urls = pool.map(lambda it: fetch_item_files(it, session), wanted)
+        return {it.get("id"): u for it, u in zip(wanted, urls)}
+
+def item_to_meta(item: dict, date_added: str, media_urls: list[str]) -> dict:
+    """Flatten an Omeka item (list or detail payload) into the poller's record shape."""
+    meta = {
+        "id": item.get("id"),
+        "date_added": date_added,
+        "title": "",
+        "creator": "",
+        "description": "",
+        "tags": normalize_tags(item.get("tags")),
+        "media_urls": media_urls,
+    }
+    for e in (item.get("element_texts") or []):
+        name = (e.get("element") or {}).get("name", "").lower()
+        if not name:
+            continue
+        text = clean_html(e.get("text", ""))
+        if name == "title":
+            meta["title"] = text
+        elif name == "creator":
+            meta["creator"] = text
+        elif name == "description":
+            meta["description"] = text
+    return meta
+
+def _complete(item: dict, session=None) -> dict | None:
+    """The list payload already carries element_texts and tags; only fetch details when they are missing."""
+    if "element_texts" in item and "tags" in item:
+        return item
+    return fetch_item_detail(item.get("id"), session)
+
 def poll_items(days:int=30, per_page:int=PER_PAGE_DEFAULT, max_pages:int=50) -> list[dict]:
-    """Fetch items added in the last `days`. Uses pagination; auto-stops when pages end."""
+    """
+    Fetch items added in the last `days`, newest first.
+
+    The cutoff is sent to Omeka as `added_since` (sorted by `added` descending), and
+    paging stops at the first page that reaches past the cutoff, so detail and file
+    requests are only made for items inside the window.
+    """
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
     page = 1
     results = []
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=max(1, FILES_MAX_WORKERS)))
+    window = {
+        "added_since": cutoff.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "sort_field": "added",
+        "sort_dir": "d",
+    }
 
     while page <= max_pages:
-        params = {"per_page": per_page, "page": page}
-        if OMEKA_API_KEY:
-            params["key"] = OMEKA_API_KEY
+        params = {"per_page": per_page, "page": page, **window, **_key_params()}
 
-        resp = requests.get(OMEKA_API_URL, params=params, timeout=30)
+        resp = session.get(OMEKA_API_URL, params=params, timeout=30)
         if resp.status_code != 200:
             print(f"❌ API error on page {page}: {resp.status_code}")
             break
@@ -90,49 +156,33 @@ def poll_items(days:int=30, per_page:int=PER_PAGE_DEFAULT, max_pages:int=50) ->
         if not batch:
             break
 
+        page_items = []
+        dates = []
         for item in batch:
             added_str = item.get("added") or ""
             try:
                 added_dt = datetime.fromisoformat(added_str.replace("Z", "+00:00"))
             except Exception:
                 continue
+            dates.append(added_dt)
 
+            # Servers that ignore added_since still send older items: skip them before any extra request
             if added_dt < cutoff:
-                # we still continue the page in case there are mixed dates,
-                # but often items are roughly chronological
-                pass
-
-            detail = fetch_item_detail(item.get("id"))
-            if not detail:
                 continue
 
-            meta = {
-                "id": item.get("id"),
-                "date_added": added_dt.strftime("%Y-%m-%d"),
-                "title": "",
-                "creator": "",
-                "description": "",
-                "tags": normalize_tags(detail.get("tags")),
-                "media_urls": [],
-            }
-
-            for e in detail.get("element_texts", []):
-                name = (e.get("element") or {}).get("name", "").lower()
-                if not name:
-                    continue
-                text = clean_html(e.get("text", ""))
-                if name == "title":
-                    meta["title"] = text
-                elif name == "creator":
-                    meta["creator"] = text
-                elif name == "description":
-                    meta["description"] = text
-
-            meta["media_urls"] = fetch_item_files(item)
-
-            # Only keep if within range; else skip
-            if added_dt >= cutoff:
-                results.append(meta)
+            detail = _complete(item, session)
+            if detail:
+                page_items.append((detail, added_dt))
+
+        files = fetch_page_files([d for d, _ in page_items], session)
+        for detail, added_dt in page_items:
+            results.append(item_to_meta(detail, added_dt.strftime("%Y-%m-%d"), files.get(detail.get("id"), [])))
+
+        # Stop once the window is exhausted: the whole page is older than the cutoff, or
+        # the page is sorted newest-first and already reached past the cutoff
+        newest_first = all(a >= b for a, b in zip(dates, dates[1:]))
+        if dates and (max(dates) < cutoff or (newest_first and dates[-1] < cutoff)):
+            break
 
         page += 1
         time.sleep(0.3)  # be polite
@@ -141,35 +191,36 @@ def poll_items(days:int=30, per_page:int=PER_PAGE_DEFAULT, max_pages:int=50) ->
     if not results:
         print("⚠️ No items in the selected date range; returning most recent page instead.")
         results = []
-        params = {"per_page": per_page, "page": 1}
-        if OMEKA_API_KEY:
-            params["key"] = OMEKA_API_KEY
-        r2 = requests.get(OMEKA_API_URL, params=params, timeout=20)
+        params = {"per_page": per_page, "page": 1, "sort_field": "added", "sort_dir": "d", **_key_params()}
+        r2 = session.get(OMEKA_API_URL, params=params, timeout=20)
         if r2.status_code == 200:
-            for item in r2.json():
-                detail = fetch_item_detail(item.get("id"))
-                if not detail:
-                    continue
-                meta = {
-                    "id": item.get("id"),
-                    "date_added": (item.get("added") or "")[:10],
-                    "title": "",
-                    "creator": "",
-                    "description": "",
-                    "tags": normalize_tags(detail.get("tags")),
-                    "media_urls": fetch_item_files(item),
-                }
-                for e in (detail.get("element_texts") or []):
-                    name = (e.get("element") or {}).get("name", "").lower()
-                    text = clean_html(e.get("text", ""))
-                    if name == "title":
-                        meta["title"] = text
-                    elif name == "creator":
-                        meta["creator"] = text
-                    elif name == "description":
-                        meta["description"] = text
-                results.append(meta)
+            details = [d for d in (_complete(item, session) for item in r2.json()) if d]
+            files = fetch_page_files(details, session)
+            for detail in details:
+                results.append(item_to_meta(detail, (detail.get("added") or "")[:10], files.get(detail.get("id"), [])))
+
+    session.close()
+    return results
 
+def poll_items_incremental(days:int=30, limit:int|None=None) -> list[dict]:
+    """
+    Like poll_items, but answers from the local Omeka mirror (utils/omeka_mirror.py),
+    items and files alike, after an incremental sync that only downloads items
+    modified since the last run. `limit` caps the result at the newest items.
+    """
+    from utils.omeka_mirror import open_mirror, sync_mirror
+
+    summary = sync_mirror(OMEKA_API_URL, OMEKA_API_KEY)
+    print(f"🔄 Mirror sync: {summary['updated']} updated, {summary['deleted']} deleted, {summary['total']} total")
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    mirror = open_mirror(OMEKA_API_URL)
+    items = mirror.items(added_since=cutoff.isoformat(), limit=limit)
+    files = mirror.files_for(it["id"] for it in items)
+    results = []
+    for it in items:
+        media_urls = [u for u in ((f.get("file_urls") or {}).get("original") for f in files[it["id"]]) if u]
+        results.append(item_to_meta(it, (it.get("added") or "")[:10], media_urls))
     return results
 
 def main():
@@ -2,8 +2,12 @@ import streamlit as st
 import requests
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from utils.omeka_mirror import open_mirror, sync_mirror
+from utils.url_health import check_url as check_url_health, is_ok
 
 # ----------------------------------------
 # CONFIGURATION
@@ -14,6 +18,7 @@ st.set_page_config(page_title="Archivo Venezuela — Metadata Checker", layout="
 load_dotenv()
 OMEKA_API_URL = os.getenv("OMEKA_API_URL", "https://archivovenezuela.com/test/api/items")
 OMEKA_API_KEY = os.getenv("OMEKA_API_KEY", "")
+CHECK_WORKERS = int(os.getenv("METADATA_CHECK_WORKERS", "8"))  # items validated in parallel
 
 # ----------------------------------------
 # HEADER
@@ -38,6 +43,11 @@ OMEKA_API_URL = custom_url.strip() or OMEKA_API_URL
 OMEKA_API_KEY = custom_key.strip() or OMEKA_API_KEY
 
 limit = st.slider("Number of recent items to check", 5, 100, 10)
+sync = st.checkbox(
+    "🔄 Sync the local Omeka mirror first (the first sync downloads the whole archive; "
+    "once synced, later runs use the mirror and only download changes)",
+    value=False
+)
 
 # ----------------------------------------
 # HELPERS
@@ -48,47 +58,57 @@ def clean_html(raw_html):
         return ""
     return BeautifulSoup(str(raw_html), "html.parser").get_text().strip()
 
-def check_url(url):
-    """Check if a URL is reachable."""
+def check_url(url, session=None):
+    """Check if a URL is reachable (answered from the shared URL health cache while fresh)."""
     if not url or not isinstance(url, str):
         return False
-    try:
-        r = requests.head(url, timeout=10)
-        return r.status_code < 400
-    except Exception:
-        return False
-
-def fetch_items(limit=20):
-    """Fetch item list from Omeka and then retrieve each item’s full JSON detail."""
-    try:
-        params = {"per_page": limit}
-        if OMEKA_API_KEY:
-            params["key"] = OMEKA_API_KEY
+    return is_ok(check_url_health(url, session=session, timeout=10))
 
-        list_response = requests.get(OMEKA_API_URL, params=params, timeout=25)
-        if list_response.status_code != 200:
-            st.error(f"❌ Failed to fetch items list — {list_response.status_code}")
+def fetch_item_files(item, session, key):
+    """File records of one item from the files endpoint; items whose files count is 0 cost no request."""
+    files = item.get("files") if isinstance(item.get("files"), dict) else {}
+    if files.get("count") == 0:
+        return []
+    url = files.get("url") or f"{OMEKA_API_URL.replace('/items', '/files')}?item={item['id']}"
+    resp = session.get(url, params=key, timeout=25)
+    return resp.json() if resp.status_code == 200 else []
+
+def fetch_recent_items(limit=20):
+    """The newest `limit` items straight from the API (one list request plus their files requests)."""
+    key = {"key": OMEKA_API_KEY} if OMEKA_API_KEY else {}
+    params = {"per_page": limit, "page": 1, "sort_field": "added", "sort_dir": "d", **key}
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=CHECK_WORKERS) as pool:
+        session.mount("https://", HTTPAdapter(pool_maxsize=CHECK_WORKERS))
+        resp = session.get(OMEKA_API_URL, params=params, timeout=25)
+        if resp.status_code != 200:
+            st.error(f"❌ Failed to fetch items list — {resp.status_code}")
             return []
-
-        list_data = list_response.json()
-        detailed_items = []
-
-        # Fetch full item JSON for each ID
-        for entry in list_data:
-            item_id = entry.get("id")
-            if not item_id:
-                continue
-
-            item_url = f"{OMEKA_API_URL.rstrip('/')}/{item_id}"
-            params_detail = {"key": OMEKA_API_KEY} if OMEKA_API_KEY else {}
-            detail_resp = requests.get(item_url, params=params_detail, timeout=25)
-
-            if detail_resp.status_code == 200:
-                detailed_items.append(detail_resp.json())
-            else:
-                st.warning(f"⚠️ Could not fetch details for item {item_id} ({detail_resp.status_code})")
-
-        return detailed_items
+        items = [item for item in resp.json()[:limit] if item.get("id") is not None]
+        for item, files in zip(items, pool.map(lambda it: fetch_item_files(it, session, key), items)):
+            item["files"] = files
+        return items
+
+def fetch_items(limit=20, sync=False):
+    """
+    The newest items with their file records attached. Once the local Omeka mirror has
+    been synced (or `sync` asks for it), it is brought up to date incrementally and read
+    locally; otherwise only the newest `limit` items are fetched from the API, since a
+    first sync downloads the whole archive.
+    """
+    try:
+        mirror = open_mirror(OMEKA_API_URL)
+        if not (sync or mirror.is_synced()):
+            return fetch_recent_items(limit)
+
+        summary = sync_mirror(OMEKA_API_URL, OMEKA_API_KEY, mirror=mirror)
+        st.caption(f"🔄 Local mirror: {summary['updated']} updated, {summary['deleted']} removed, "
+                   f"{summary['total']} items in total")
+
+        items = mirror.items(limit=limit)
+        files = mirror.files_for(item["id"] for item in items)
+        for item in items:
+            item["files"] = files[item["id"]]
+        return items
     except Exception as e:
         st.error(f"⚠️ Connection error while fetching items: {e}")
         return []
@@ -101,88 +121,97 @@ def extract_field(elements, field_name):
             return clean_html(e.get("text", ""))
     return ""
 
+def check_item(item, session=None):
+    """
+    Validation row for one item. Safe to run in worker threads: the only slow part, the
+    image and link checks, is answered from the shared URL health store while fresh
+    (failed URLs are re-checked after its shorter fail TTL).
+    """
+    elements = item.get("element_texts", [])
+    files = item.get("files") or []
+
+    def get_field(name_options):
+        for e in elements:
+            field_name = e["element"]["name"].strip().lower()
+            if any(field_name == opt.lower() for opt in name_options):
+                return clean_html(e.get("text", ""))
+        return ""
+
+    # Extract fields (support both English and DC naming)
+    title = get_field(["Title", "Dublin Core:Title"])
+    creator = get_field(["Creator", "Dublin Core:Creator"])
+    description = get_field(["Description", "Dublin Core:Description"])
+    date = get_field(["Date", "Dublin Core:Date"])
+
+    # Image check
+    has_image = isinstance(files, list) and len(files) > 0
+    image_ok = False
+    img_url = ""
+
+    if has_image:
+        first_file = files[0] if isinstance(files[0], dict) else {}
+        img_url = first_file.get("file_urls", {}).get("original", "")
+        if img_url and img_url.startswith("http"):
+            image_ok = check_url(img_url, session)
+
+    # URL check
+    all_links = [
+        e.get("text") for e in elements
+        if isinstance(e.get("text"), str) and "http" in e.get("text")
+    ]
+    has_url = len(all_links) > 0
+    url_ok = any(check_url(link, session) for link in all_links) if has_url else False
+
+    # Metadata completeness
+    missing = [
+        field for field, value in {
+            "Title": title,
+            "Creator": creator,
+            "Description": description,
+            "Date": date
+        }.items() if not value
+    ]
+
+    status = "✅ Complete"
+    if missing:
+        status = f"⚠️ Missing: {', '.join(missing)}"
+    if has_image and not image_ok:
+        status += " | ⚠️ Broken Image"
+
+    return {
+        "Item ID": item.get("id", ""),
+        "Title": title or "(No Title)",
+        "Creator": creator or "(No Creator)",
+        "Description": (description[:80] + "...") if description else "(No Description)",
+        "Date": date or "(No Date)",
+        "Image URL": img_url or "(None)",
+        "Image Status": "✅ OK" if image_ok else ("⚠️ Broken" if has_image else "❌ None"),
+        "Links OK": "✅" if url_ok else ("⚠️ Invalid" if has_url else "❌ None"),
+        "Overall Status": status.strip(" |")
+    }
+
 def validate_metadata(items):
-    """Validate metadata completeness, images, and URLs using full item details."""
+    """Validate metadata completeness, images, and URLs, checking several items at once."""
     results = []
 
-    for i, item in enumerate(items, start=1):
-        try:
-            elements = item.get("element_texts", [])
-            files = item.get("files") or []
-
-            def get_field(name_options):
-                for e in elements:
-                    field_name = e["element"]["name"].strip().lower()
-                    if any(field_name == opt.lower() for opt in name_options):
-                        return clean_html(e.get("text", ""))
-                return ""
-
-            # Extract fields (support both English and DC naming)
-            title = get_field(["Title", "Dublin Core:Title"])
-            creator = get_field(["Creator", "Dublin Core:Creator"])
-            description = get_field(["Description", "Dublin Core:Description"])
-            date = get_field(["Date", "Dublin Core:Date"])
-
-            # Image check
-            has_image = isinstance(files, list) and len(files) > 0
-            image_ok = False
-            img_url = ""
-
-            if has_image:
-                first_file = files[0] if isinstance(files[0], dict) else {}
-                img_url = first_file.get("file_urls", {}).get("original", "")
-                if img_url and img_url.startswith("http"):
-                    image_ok = check_url(img_url)
-
-            # URL check
-            all_links = [
-                e.get("text") for e in elements
-                if isinstance(e.get("text"), str) and "http" in e.get("text")
-            ]
-            has_url = len(all_links) > 0
-            url_ok = any(check_url(link) for link in all_links) if has_url else False
-
-            # Metadata completeness
-            missing = [
-                field for field, value in {
-                    "Title": title,
-                    "Creator": creator,
-                    "Description": description,
-                    "Date": date
-                }.items() if not value
-            ]
-
-            status = "✅ Complete"
-            if missing:
-                status = f"⚠️ Missing: {', '.join(missing)}"
-            if has_image and not image_ok:
-                status += " | ⚠️ Broken Image"
-
-            # Append result
-            results.append({
-                "Item ID": item.get("id", ""),
-                "Title": title or "(No Title)",
-                "Creator": creator or "(No Creator)",
-                "Description": (description[:80] + "...") if description else "(No Description)",
-                "Date": date or "(No Date)",
-                "Image URL": img_url or "(None)",
-                "Image Status": "✅ OK" if image_ok else ("⚠️ Broken" if has_image else "❌ None"),
-                "Links OK": "✅" if url_ok else ("⚠️ Invalid" if has_url else "❌ None"),
-                "Overall Status": status.strip(" |")
-            })
-
-        except Exception as e:
-            st.warning(f"⚠️ Error checking item {i}: {e}")
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=CHECK_WORKERS) as pool:
+        session.mount("https://", HTTPAdapter(pool_maxsize=CHECK_WORKERS))
+        session.mount("http://", HTTPAdapter(pool_maxsize=CHECK_WORKERS))
+        futures = [pool.submit(check_item, item, session) for item in items]
+        for i, future in enumerate(futures, start=1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                st.warning(f"⚠️ Error checking item {i}: {e}")
 
     return pd.DataFrame(results)
 
-
 # ----------------------------------------
 # MAIN LOGIC
 # ----------------------------------------
 if st.button("🔍 Run Metadata Validation"):
     with st.spinner("Fetching and validating metadata... ⏳"):
-        items = fetch_items(limit)
+        items = fetch_items(limit, sync)
         if not items:
             st.warning("⚠️ No items retrieved. Check API URL or key.")
         else:
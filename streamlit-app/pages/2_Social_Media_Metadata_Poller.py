@@ -2,7 +2,7 @@ import streamlit as st
 import json
 import os
 from datetime import datetime
-from automation.omeka_metadata_poller import poll_items
+from automation.omeka_metadata_poller import poll_items, poll_items_incremental
 
 # -----------------------------
 # PAGE CONFIG
@@ -23,13 +23,20 @@ and prepares them for social-media caption generation.
 # -----------------------------
 days = st.slider("How many past days to include?", 5, 90, 30)
 limit = st.number_input("Maximum number of items to fetch", 10, 200, 50)
+incremental = st.checkbox(
+    "⚡ Incremental sync (keep a local mirror and only download items changed since the last run)",
+    value=True
+)
 
 # -----------------------------
 # FETCH BUTTON
 # -----------------------------
 if st.button("📥 Fetch Metadata from Omeka"):
     with st.spinner("Fetching items from Omeka..."):
-        items = poll_items(days=days, per_page=limit)
+        if incremental:
+            items = poll_items_incremental(days=days, limit=limit)
+        else:
+            items = poll_items(days=days, per_page=limit)
 
     if not items:
         st.warning("⚠️ No items found for the selected period.")
@@ -1,10 +1,11 @@
 import streamlit as st
-import os, json, csv, re
+import os, csv, re
 from datetime import datetime
 import requests
 import pandas as pd
 from dotenv import load_dotenv
 from html import unescape
+from utils.raw_store import RAW_STORE_PATH, open_store
 
 # Optional WorldCat helpers if present in your repo
 try:
@@ -19,7 +20,7 @@ except Exception:
 st.set_page_config(page_title="📡 Cross-Platform Metadata Aggregator", layout="wide")
 st.title("📡 Cross-Platform Metadata Aggregator")
 st.info(
-    "Fetch metadata from multiple sources (OMDb/IMDb, YouTube, Spotify, WorldCat) and save a unified `raw_metadata.json` for the next steps.\n"
+    "Fetch metadata from multiple sources (OMDb/IMDb, YouTube, Spotify, WorldCat) and save them to the unified `raw_metadata.jsonl` store for the next steps.\n"
     "YouTube & Spotify use oEmbed (no API key). OMDb & WorldCat require keys in `.env`."
 )
 
@@ -40,27 +41,14 @@ def clean_text(x: str) -> str:
     return unescape(x).strip()
 
 def save_outputs(rows, source_name):
-    """Append rows to raw_metadata.json and log to source_log.csv."""
-    raw_path = "data/raw_metadata.json"
-    # Load existing
-    existing = []
-    if os.path.exists(raw_path):
-        try:
-            with open(raw_path, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-        except Exception:
-            existing = []
-
-    # Append and save
-    merged = existing + rows
-    with open(raw_path, "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
+    """Append new or changed rows to the raw store and log to source_log.csv."""
+    saved = open_store().append(rows)
 
     # Log
     log_path = "data/source_log.csv"
     new_entries = [{"timestamp": datetime.now().isoformat()+"Z",
                     "source": source_name,
-                    "count": len(rows)}]
+                    "count": saved}]
     write_header = not os.path.exists(log_path)
     with open(log_path, "a", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=["timestamp", "source", "count"])
@@ -69,7 +57,8 @@ def save_outputs(rows, source_name):
         for r in new_entries:
             writer.writerow(r)
 
-    st.success(f"✅ Saved {len(rows)} records to `data/raw_metadata.json`")
+    st.success(f"✅ Saved {saved} new or updated records to `{RAW_STORE_PATH}`"
+               + (f" ({len(rows) - saved} already stored)" if saved < len(rows) else ""))
     st.caption(f"Logged import → `data/source_log.csv`")
 
 def show_preview(rows, max_rows=5):
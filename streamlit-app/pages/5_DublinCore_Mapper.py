@@ -1,7 +1,9 @@
 import streamlit as st
 import os, json, pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from googletrans import Translator
+from utils.translation import TRANSLATION_ENGINE, translate_batch, translate_text
+from utils.raw_store import open_store, record_digest
 
 # ---------------------------
 # CONFIG
@@ -10,7 +12,7 @@ st.set_page_config(page_title="🌍 Dublin Core Mapper + Validator", layout="wid
 st.title("🌍 Bilingual Dublin Core Mapper + Validator")
 
 st.info("""
-This tool converts your aggregated `raw_metadata.json` into **bilingual Dublin Core (English + Spanish)** records,
+This tool converts your aggregated `raw_metadata.jsonl` into **bilingual Dublin Core (English + Spanish)** records,
 validates metadata completeness, and exports two files:
 - `dublin_core_bilingual.csv` → main dataset
 - `metadata_issues.csv` → incomplete or invalid records
@@ -18,43 +20,54 @@ validates metadata completeness, and exports two files:
 
 load_dotenv()
 os.makedirs("data", exist_ok=True)
-translator = Translator()
+
+# Unique strings are translated in chunks of this size, several chunks at a time
+TRANSLATE_CHUNK = int(os.getenv("DC_TRANSLATE_CHUNK", "200"))
+TRANSLATE_WORKERS = int(os.getenv("DC_TRANSLATE_WORKERS", "4"))
+
+# Mapped rows are appended here as they are built; renamed to the final CSV once complete
+PARTIAL_CSV = "data/dublin_core_bilingual.partial.csv"
+MAP_FLUSH_ROWS = 500
 
 # ---------------------------
 # HELPERS
 # ---------------------------
-def translate_text(text):
-    """Translate text using Google Translate (English→Spanish, automatic detection)."""
-    if not text or not isinstance(text, str):
-        return ""
-    try:
-        return translator.translate(text, dest="es").text
-    except Exception:
-        return text  # fallback
-
 def validate_record(dc_row):
     """Return list of missing required Dublin Core fields."""
     required = ["Title (EN)", "Creator (EN)", "Description (EN)", "Date"]
     return [r for r in required if not dc_row.get(r, "").strip()]
 
-def map_to_dublin_core(item):
-    """Map one metadata record (any source) to bilingual Dublin Core."""
-    title = item.get("title") or item.get("Title") or ""
-    creator = item.get("creator") or item.get("Creator") or ""
-    desc = item.get("description") or item.get("Description") or ""
+def _english_fields(item):
+    """Title, creator and description of a record, whichever key casing it uses."""
+    return (
+        item.get("title") or item.get("Title") or "",
+        item.get("creator") or item.get("Creator") or "",
+        item.get("description") or item.get("Description") or "",
+    )
+
+def map_to_dublin_core(item, spanish=None):
+    """
+    Map one metadata record (any source) to bilingual Dublin Core.
+    `spanish` maps English strings to their translations; anything missing is translated on the spot.
+    """
+    title, creator, desc = _english_fields(item)
     date = item.get("date") or item.get("Date") or ""
     tags = item.get("tags", [])
     img = item.get("media_urls", [])
+    spanish = spanish or {}
+
+    def es(text):
+        return spanish[text] if text in spanish else translate_text(text)
 
     dc = {
         "Source": item.get("source", ""),
         "Identifier": item.get("id", ""),
         "Title (EN)": title,
-        "Title (ES)": translate_text(title),
+        "Title (ES)": es(title),
         "Creator (EN)": creator,
-        "Creator (ES)": translate_text(creator),
+        "Creator (ES)": es(creator),
         "Description (EN)": desc,
-        "Description (ES)": translate_text(desc),
+        "Description (ES)": es(desc),
         "Date": date,
         "Tags": "; ".join(tags) if isinstance(tags, list) else tags,
         "Media URL": img[0] if isinstance(img, list) and img else "",
@@ -62,46 +75,151 @@ def map_to_dublin_core(item):
     dc["Missing Fields"] = ", ".join(validate_record(dc))
     return dc
 
+def unique_texts(items):
+    """Every distinct non-empty title, creator and description, in first-seen order."""
+    return list(dict.fromkeys(text for item in items for text in _english_fields(item) if text))
+
+def translate_unique(texts, progress=None):
+    """
+    English → Spanish for a list of unique strings, TRANSLATE_WORKERS chunks at a time.
+    Each finished chunk lands in the translation memory, so an interrupted run picks
+    up where it stopped instead of translating everything again.
+    """
+    chunks = [texts[i:i + TRANSLATE_CHUNK] for i in range(0, len(texts), TRANSLATE_CHUNK)]
+    workers = 1 if TRANSLATION_ENGINE == "marian" else TRANSLATE_WORKERS  # one local model, one thread
+    spanish = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(translate_batch, chunk): chunk for chunk in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            spanish.update(zip(futures[future], future.result()))
+            if progress:
+                progress(done, len(chunks))
+    return spanish
+
+def _append_rows(path, rows):
+    pd.DataFrame(rows).to_csv(path, mode="a", header=not os.path.exists(path), index=False, encoding="utf-8")
+
+# Columns that identify a mapped row; records without an id are told apart by their English fields
+ROW_KEY_FIELDS = ("Source", "Identifier")
+ROW_CONTENT_FIELDS = ("Title (EN)", "Creator (EN)", "Description (EN)", "Date", "Media URL")
+# Partial-file column holding the digest of the record each row was mapped from (not exported)
+DIGEST_FIELD = "Record Digest"
+
+def row_key(dc_row):
+    """Identity of a mapped row, comparable between fresh rows and rows read back from the partial CSV."""
+    fields = ROW_KEY_FIELDS if str(dc_row.get("Identifier", "")).strip() else ROW_KEY_FIELDS + ROW_CONTENT_FIELDS
+    return tuple(str(dc_row.get(f, "")) for f in fields)
+
+def map_all_to_dublin_core(items, total=None, progress=None, resume=True, partial_path=PARTIAL_CSV):
+    """
+    Map every record in two stages: translate all unique titles, creators and descriptions
+    in one parallel, cached pass, then assemble the bilingual rows into `partial_path`.
+
+    `items` is read twice, so it can be a list or a RawStore streamed from disk.
+    With `resume`, a record is skipped when the partial file from an interrupted run already
+    holds a row with its (Source, Identifier) mapped from the same record content, wherever
+    it now sits in the store; a record changed since then is mapped again and replaces its
+    stale row. `progress(stage, done, total)` is called as "translate" chunks and, when
+    `total` is known, "map" records finish.
+    """
+    spanish = translate_unique(unique_texts(items), progress and (lambda d, n: progress("translate", d, n)))
+
+    done, replaced = {}, set()  # row key → digest of the record it was mapped from; keys with stale rows
+    if resume and os.path.exists(partial_path):
+        partial = pd.read_csv(partial_path, dtype=str, keep_default_na=False)
+        if DIGEST_FIELD in partial.columns:
+            for r in partial.to_dict("records"):
+                key = row_key(r)
+                if done.get(key, r[DIGEST_FIELD]) != r[DIGEST_FIELD]:
+                    replaced.add(key)  # remapped by an earlier resume that was interrupted too
+                done[key] = r[DIGEST_FIELD]
+        else:
+            resume = False  # written before digests were kept, so no row can be trusted
+    if not resume and os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    show_map = progress if progress and total else None
+    batch, remapped = [], {}
+    for n, item in enumerate(items, 1):
+        dc = map_to_dublin_core(item, spanish)
+        dc[DIGEST_FIELD] = record_digest(item)
+        key = row_key(dc)
+        if key in done:
+            if done[key] != dc[DIGEST_FIELD] or key in replaced:
+                remapped[key] = dc[DIGEST_FIELD]
+            if done[key] == dc[DIGEST_FIELD]:
+                continue
+        batch.append(dc)
+        if len(batch) >= MAP_FLUSH_ROWS:
+            _append_rows(partial_path, batch)
+            batch = []
+            if show_map:
+                show_map("map", n, total)
+    if batch:
+        _append_rows(partial_path, batch)
+    if show_map:
+        show_map("map", total, total)
+    if not os.path.exists(partial_path):
+        return pd.DataFrame()
+    df = pd.read_csv(partial_path, dtype=str, keep_default_na=False)
+    if remapped:
+        stale = [remapped.get(row_key(r), r[DIGEST_FIELD]) != r[DIGEST_FIELD] for r in df.to_dict("records")]
+        df = df[[not s for s in stale]].reset_index(drop=True)
+    return df.drop(columns=[DIGEST_FIELD])
+
 # ---------------------------
 # MAIN
 # ---------------------------
-import os, json, pandas as pd
-import streamlit as st
-
-# Attempt to locate metadata JSON in multiple common paths
-possible_paths = [
-    "data/raw_metadata.json",
-    "data/items_metadata.json",
-    "items_metadata.json",
-    "data/raw_metadta.json"  # typo safeguard
-]
-
+# Prefer the Aggregator's raw store (streamed, never loaded whole); fall back to the Poller's JSON
 items = None
-for path in possible_paths:
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            items = json.load(f)
-        st.success(f"✅ Loaded {len(items)} records from `{path}` for mapping.")
-        break
+store = open_store()
+record_count = store.count()
+if record_count:
+    items = store
+    st.success(f"✅ Found {record_count} records in `{store.path}` for mapping.")
+else:
+    possible_paths = [
+        "data/items_metadata.json",
+        "items_metadata.json",
+        "data/raw_metadta.json"  # typo safeguard
+    ]
+    for path in possible_paths:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            st.success(f"✅ Loaded {len(items)} records from `{path}` for mapping.")
+            break
 
 if items is None:
     st.error("❌ No metadata file found. Please run the Metadata Poller or Aggregator first.")
     st.stop()
 
+record_total = record_count if items is store else len(items)
+resume = st.checkbox("Resume an interrupted run", value=True, disabled=not os.path.exists(PARTIAL_CSV),
+                     help="Keep the rows already mapped in the partial output and continue after them.")
+
 # Generate Bilingual Dublin Core
 if st.button("🚀 Generate Bilingual Dublin Core"):
+    progress_bar = st.progress(0.0, text="Translating unique strings...")
+
+    def show_progress(stage, done, total):
+        if stage == "translate":
+            progress_bar.progress(done / max(total, 1) * 0.5, text=f"Translated {done}/{total} chunks of unique strings")
+        else:
+            progress_bar.progress(0.5 + done / max(total, 1) * 0.5, text=f"Mapped {done}/{total} records")
+
     with st.spinner("Translating + mapping metadata..."):
         try:
-            mapped = [map_to_dublin_core(i) for i in items]
-
-            df = pd.DataFrame(mapped)
-            issues_df = df[df["Missing Fields"].astype(bool)]
+            df = map_all_to_dublin_core(items, record_total, show_progress, resume=resume)
+            issues_df = df[df["Missing Fields"].astype(bool)] if len(df) else df
 
             os.makedirs("data", exist_ok=True)
             dc_csv = "data/dublin_core_bilingual.csv"
             issues_csv = "data/metadata_issues.csv"
 
             df.to_csv(dc_csv, index=False, encoding="utf-8-sig")
+            if os.path.exists(PARTIAL_CSV):
+                os.remove(PARTIAL_CSV)  # complete, so the next run starts fresh
             issues_df.to_csv(issues_csv, index=False, encoding="utf-8-sig")
 
             st.success(f"✅ Mapped {len(df)} records. {len(issues_df)} incomplete entries flagged.")
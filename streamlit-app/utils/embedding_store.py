@@ -0,0 +1,176 @@
+# utils/embedding_store.py
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+try:
+    import fcntl  # POSIX: lock the vector file so several app processes can append to one store
+except ImportError:
+    fcntl = None
+
+# One store per embedding model, kept next to the other local stores
+EMBEDDING_STORE_DIR = os.getenv(
+    "EMBEDDING_STORE_DIR", os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "embeddings")
+)
+# Candidate phrases grow with the corpus vocabulary, so their store stops taking new rows here
+# (500k rows of 384 float32s is about 770 MB); phrases past the cap are still encoded, just not kept
+PHRASE_STORE_MAX_ROWS = int(os.getenv("EMBEDDING_PHRASE_MAX_ROWS", "500000"))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent text → embedding cache for one model.
+
+    Vectors live in a flat float32 file read through np.memmap (appended to, never
+    rewritten); a SQLite index maps each text's hash to its row and keeps the text
+    itself, so the matrix can also be searched by similarity. With `max_rows`, the
+    store stops growing at that many rows and later texts are only encoded.
+    """
+
+    def __init__(self, directory: str, max_rows: int | None = None):
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._mm = None
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                hash TEXT PRIMARY KEY,
+                row  INTEGER NOT NULL,
+                text TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _matrix(self) -> np.ndarray:
+        """All stored vectors (including rows orphaned by a crash), memory-mapped read-only."""
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4) if self.dim and os.path.exists(self.vectors_path) else 0
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self._mm is None or self._mm.shape[0] != rows:
+            self._mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._mm
+
+    def rows(self, texts: list[str]) -> dict:
+        """hash → row for whichever of `texts` are already stored."""
+        hashes = list(dict.fromkeys(text_hash(t) for t in texts))
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                found.update(self._conn.execute(
+                    f"SELECT hash, row FROM embeddings WHERE hash IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return found
+
+    def add(self, texts: list[str], vectors) -> None:
+        """Append vectors for texts not stored yet."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store's {self.dim}")
+            with open(self.vectors_path, "ab") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0, os.SEEK_END)
+                    first = f.tell() // (self.dim * 4)
+                    f.seek(first * self.dim * 4)  # "ab" always appends; truncate a torn row first
+                    f.truncate()
+                    f.write(vectors.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?)",
+                ((text_hash(t), first + i, t) for i, t in enumerate(texts)),
+            )
+            self._conn.commit()
+
+    def get(self, texts: list[str], encode) -> np.ndarray:
+        """
+        One embedding per text, in order. Only texts never seen before are passed to
+        `encode(list[str]) -> array` (once each); their vectors are stored for next time,
+        as far as `max_rows` allows.
+        """
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        found = self.rows(texts)
+        missing = list(dict.fromkeys(t for t in texts if text_hash(t) not in found))
+        unstored = {}
+        if missing:
+            vectors = np.asarray(encode(missing), dtype=np.float32)
+            room = len(missing) if self.max_rows is None else max(0, min(len(missing), self.max_rows - len(self)))
+            self.add(missing[:room], vectors[:room])
+            unstored = dict(zip(missing[room:], vectors[room:]))
+            found = self.rows(texts)
+        with self._lock:
+            matrix = self._matrix()
+            if not unstored:
+                return np.asarray(matrix[[found[text_hash(t)] for t in texts]])
+            return np.stack([unstored[t] if t in unstored else np.asarray(matrix[found[text_hash(t)]]) for t in texts])
+
+    def most_similar(self, vector, top_n: int = 10, chunk_rows: int = 100_000) -> list[tuple[str, float]]:
+        """Stored texts closest to `vector` by cosine similarity, best first."""
+        query = np.asarray(vector, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            matrix = self._matrix()
+            best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            for start in range(0, matrix.shape[0], chunk_rows):
+                block = np.asarray(matrix[start:start + chunk_rows])
+                scores = block @ query / np.maximum(np.linalg.norm(block, axis=1), 1e-12)
+                best_rows = np.concatenate([best_rows, np.arange(start, start + len(block))])
+                best_scores = np.concatenate([best_scores, scores])
+                keep = np.argsort(-best_scores)[:top_n]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+            texts = dict(self._conn.execute(
+                f"SELECT row, text FROM embeddings WHERE row IN ({', '.join('?' * len(best_rows))})",
+                [int(r) for r in best_rows],
+            ).fetchall()) if len(best_rows) else {}
+        return [(texts[int(r)], float(s)) for r, s in zip(best_rows, best_scores) if int(r) in texts]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(model_name: str, kind: str = "documents") -> EmbeddingStore:
+    """
+    Process-wide store for a model's embeddings under EMBEDDING_STORE_DIR: "documents",
+    or "phrases" for KeyBERT candidate phrases, kept apart and capped at PHRASE_STORE_MAX_ROWS.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", model_name).strip("_") or "model"
+    directory = os.path.join(EMBEDDING_STORE_DIR, slug)
+    if kind == "phrases":
+        directory = os.path.join(directory, "phrases")
+    elif kind != "documents":
+        raise ValueError(f"Unknown embedding store kind: {kind}")
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = EmbeddingStore(directory, PHRASE_STORE_MAX_ROWS if kind == "phrases" else None)
+        return _stores[directory]
@@ -0,0 +1,248 @@
+# utils/fast_index.py
+import os
+import re
+import csv
+import gzip
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# Built once from an offline FAST dump (python -m utils.fast_index build <dump files>)
+FAST_INDEX_DIR = os.getenv(
+    "FAST_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".archivo_venezuela", "fast_index")
+)
+# Phrases whose best heading scores below this cosine similarity are left unmatched
+FAST_MATCH_MIN_SCORE = float(os.getenv("FAST_MATCH_MIN_SCORE", "0.7"))
+# Most index rows a phrase is compared with when its tokens narrow the search
+FAST_MAX_CANDIDATES = int(os.getenv("FAST_MAX_CANDIDATES", "2000"))
+# Phrases are scored in groups whose pooled candidate rows stay under this (65536 x 384 float32s is ~100 MB)
+FAST_MATCH_BLOCK_ROWS = int(os.getenv("FAST_MATCH_BLOCK_ROWS", "65536"))
+
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+TRIPLE_RE = re.compile(r'^<([^>]+)>\s+<([^>]+)>\s+"((?:[^"\\]|\\.)*)"')
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(str(text).casefold()) if len(t) > 1]
+
+
+def _open(path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+
+def read_fast_dump(path: str) -> dict:
+    """
+    uri → {"label", "alt_labels"} from a FAST dump: OCLC's N-Triples release
+    (.nt / .nt.gz, skos:prefLabel and skos:altLabel) or a CSV with `uri`, `label`
+    and optional `alt_labels` columns ("|"-separated).
+    """
+    headings = defaultdict(lambda: {"label": "", "alt_labels": []})
+    with _open(path) as f:
+        if ".csv" in path:
+            for row in csv.DictReader(f):
+                if row.get("uri") and row.get("label"):
+                    heading = headings[row["uri"].strip()]
+                    heading["label"] = row["label"].strip()
+                    heading["alt_labels"] += [a.strip() for a in (row.get("alt_labels") or "").split("|") if a.strip()]
+        else:
+            for line in f:
+                m = TRIPLE_RE.match(line)
+                if not m or not m.group(2).startswith(SKOS):
+                    continue
+                uri, predicate, literal = m.group(1), m.group(2)[len(SKOS):], m.group(3)
+                try:
+                    literal = json.loads(f'"{literal}"')  # N-Triples escapes are JSON escapes
+                except ValueError:
+                    pass
+                if predicate == "prefLabel":
+                    headings[uri]["label"] = literal
+                elif predicate == "altLabel":
+                    headings[uri]["alt_labels"].append(literal)
+    return {uri: h for uri, h in headings.items() if h["label"]}
+
+
+def build_fast_index(dump_paths: list[str], embed, out_dir: str = FAST_INDEX_DIR, batch_size: int = 4096,
+                     model_name: str = "") -> dict:
+    """
+    Write a FastIndex to `out_dir`: one row per label and alternate label, holding its
+    normalized embedding (`embed(list[str]) -> array`), the heading it belongs to and an
+    inverted token → rows index. Returns the index metadata; raises ValueError if the
+    dumps hold no labels, leaving no index behind.
+    """
+    headings = {}
+    for path in dump_paths:
+        headings.update(read_fast_dump(path))
+    uris = list(headings)
+    labels = [headings[u]["label"] for u in uris]
+    terms, term_heading = [], []
+    for i, uri in enumerate(uris):
+        for term in dict.fromkeys([labels[i], *headings[uri]["alt_labels"]]):
+            terms.append(term)
+            term_heading.append(i)
+    if not terms:
+        raise ValueError(f"No FAST labels found in {', '.join(dump_paths)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(os.path.join(out_dir, "meta.json")):
+        os.remove(os.path.join(out_dir, "meta.json"))  # written last, so a half-built index is never loaded
+    vectors = None
+    for start in range(0, len(terms), batch_size):
+        block = np.asarray(embed(terms[start:start + batch_size]), dtype=np.float32)
+        block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(os.path.join(out_dir, "vectors.npy"), mode="w+",
+                                                dtype=np.float32, shape=(len(terms), block.shape[1]))
+        vectors[start:start + len(block)] = block
+        print(f"🧮 Embedded {min(start + batch_size, len(terms))}/{len(terms)} FAST labels")
+    dim = int(vectors.shape[1])
+    vectors.flush()
+    del vectors
+
+    postings = defaultdict(list)
+    for row, term in enumerate(terms):
+        for token in set(tokenize(term)):
+            postings[token].append(row)
+    tokens = sorted(postings)
+    offsets = np.cumsum([0] + [len(postings[t]) for t in tokens], dtype=np.int64)
+    flat = np.fromiter((row for t in tokens for row in postings[t]), dtype=np.int32, count=int(offsets[-1]))
+
+    np.save(os.path.join(out_dir, "term_heading.npy"), np.asarray(term_heading, dtype=np.int32))
+    np.save(os.path.join(out_dir, "postings_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "postings.npy"), flat)
+    with open(os.path.join(out_dir, "tokens.json"), "w", encoding="utf-8") as f:
+        json.dump(tokens, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "headings.json"), "w", encoding="utf-8") as f:
+        json.dump({"uris": uris, "labels": labels}, f, ensure_ascii=False)
+    meta = {"model": model_name, "headings": len(uris), "terms": len(terms), "dim": dim, "built_at": time.time(),
+            "sources": [os.path.basename(p) for p in dump_paths]}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+class FastIndex:
+    """
+    Local FAST subject index, memory-mapped from a directory written by build_fast_index.
+
+    match() maps free-text phrases to real FAST headings by cosine nearest neighbour:
+    each phrase's candidates are the labels sharing its rarest tokens (via the inverted
+    index); phrases are grouped and scored against their pooled candidates with one matrix
+    product per group, and phrases sharing no token are scanned against every label.
+    """
+
+    def __init__(self, directory: str = FAST_INDEX_DIR):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, "headings.json"), encoding="utf-8") as f:
+            headings = json.load(f)
+        self.uris, self.labels = headings["uris"], headings["labels"]
+        with open(os.path.join(directory, "tokens.json"), encoding="utf-8") as f:
+            self.token_ids = {t: i for i, t in enumerate(json.load(f))}
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.term_heading = np.load(os.path.join(directory, "term_heading.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "postings_offsets.npy"), mmap_mode="r")
+        self.postings = np.load(os.path.join(directory, "postings.npy"), mmap_mode="r")
+        # Inverse document frequency of each token over the index rows
+        self.idf = np.log(len(self.vectors) / np.maximum(np.diff(self.offsets), 1)).astype(np.float32)
+
+    @staticmethod
+    def exists(directory: str = FAST_INDEX_DIR) -> bool:
+        """True once a build has finished (meta.json is written last)."""
+        return os.path.exists(os.path.join(directory, "meta.json"))
+
+    def candidates(self, phrase: str, limit: int = FAST_MAX_CANDIDATES) -> np.ndarray:
+        """
+        Rows with the highest IDF-weighted token overlap with `phrase` (at most `limit`),
+        so a shared rare word outweighs a shared common one; empty if none share any.
+        """
+        ids = [self.token_ids[t] for t in dict.fromkeys(tokenize(phrase)) if t in self.token_ids]
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in ids])
+        weights = np.repeat(self.idf[ids], [int(self.offsets[i + 1] - self.offsets[i]) for i in ids])
+        rows, inverse = np.unique(rows, return_inverse=True)
+        if len(rows) > limit:
+            overlap = np.bincount(inverse, weights=weights)
+            rows = np.sort(rows[np.argpartition(-overlap, limit - 1)[:limit]])
+        return rows
+
+    def _scan(self, queries: np.ndarray, chunk_rows: int = 200_000) -> tuple[np.ndarray, np.ndarray]:
+        """Best row and score of every query against the whole matrix."""
+        best_rows = np.zeros(len(queries), dtype=np.int64)
+        best_scores = np.full(len(queries), -np.inf, dtype=np.float32)
+        for start in range(0, self.vectors.shape[0], chunk_rows):
+            scores = queries @ np.asarray(self.vectors[start:start + chunk_rows]).T
+            top = scores.argmax(axis=1)
+            top_scores = scores[np.arange(len(queries)), top]
+            better = top_scores > best_scores
+            best_rows[better], best_scores[better] = top[better] + start, top_scores[better]
+        return best_rows, best_scores
+
+    def match(self, phrases: list[str], query_vectors, min_score: float = FAST_MATCH_MIN_SCORE) -> list[dict | None]:
+        """
+        Best FAST heading for each phrase ({"label", "uri", "score", "matched"}), or None
+        below `min_score`. `query_vectors` are the phrases' embeddings from the index's model.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        best_rows = np.full(len(phrases), -1, dtype=np.int64)
+        best_scores = np.full(len(phrases), -np.inf, dtype=np.float32)
+
+        unnarrowed, group, pooled = [], [], []
+
+        def score_group():
+            # Every phrase in the group is scored against the union of the group's candidates
+            rows = np.unique(np.concatenate(pooled))  # sorted rows read the memmap in file order
+            scores = queries[group] @ np.asarray(self.vectors[rows]).T
+            top = scores.argmax(axis=1)
+            best_rows[group], best_scores[group] = rows[top], scores[np.arange(len(group)), top]
+
+        for i, phrase in enumerate(phrases):
+            rows = self.candidates(phrase)
+            if not len(rows):
+                unnarrowed.append(i)
+                continue
+            if group and sum(map(len, pooled)) + len(rows) > FAST_MATCH_BLOCK_ROWS:
+                score_group()
+                group, pooled = [], []
+            group.append(i)
+            pooled.append(rows)
+        if group:
+            score_group()
+        if unnarrowed:
+            best_rows[unnarrowed], best_scores[unnarrowed] = self._scan(queries[unnarrowed])
+
+        matches = []
+        for phrase, row, score in zip(phrases, best_rows, best_scores):
+            if row < 0 or score < min_score:
+                matches.append(None)
+                continue
+            heading = int(self.term_heading[row])
+            matches.append({"label": self.labels[heading], "uri": self.uris[heading],
+                            "score": float(score), "matched": phrase})
+        return matches
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the local FAST subject index from offline FAST dumps.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("dumps", nargs="+", help="FAST N-Triples (.nt/.nt.gz) or CSV files")
+    parser.add_argument("--out", default=FAST_INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    from utils.fast_semantic_enrichment import KEYBERT_MODEL, get_kw_model
+
+    try:
+        meta = build_fast_index(args.dumps, get_kw_model().model.embed, args.out, model_name=KEYBERT_MODEL)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ Indexed {meta['headings']} FAST headings ({meta['terms']} labels) in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,109 @@
 # utils/fast_semantic_enrichment.py
+import os
+import numpy as np
 import pandas as pd
 import time
-from keybert import KeyBERT
-from utils.translation import translate_text
+import threading
+from utils.translation import translate_batch
+from utils.embedding_store import open_store
+from utils.fast_index import FAST_INDEX_DIR, FastIndex
 
-# Initialize the KeyBERT model (this loads once)
-kw_model = KeyBERT(model='all-MiniLM-L6-v2')
+# Sentence-transformers model behind KeyBERT; loaded on first use, not at import
+KEYBERT_MODEL = os.getenv("KEYBERT_MODEL", "all-MiniLM-L6-v2")
+
+# Documents handed to KeyBERT per call; each call embeds its documents and candidate phrases together
+ENRICH_BATCH_SIZE = int(os.getenv("FAST_ENRICH_BATCH_SIZE", "256"))
+
+KEYWORD_OPTIONS = dict(keyphrase_ngram_range=(1, 3), stop_words='english', top_n=8)
+
+_kw_model = None
+_model_lock = threading.Lock()
+_warm_up_started = False
+
+def get_kw_model():
+    """Process-wide KeyBERT instance; keybert and the embedding model are only imported and loaded here."""
+    global _kw_model
+    with _model_lock:
+        if _kw_model is None:
+            from keybert import KeyBERT
+            _kw_model = KeyBERT(model=KEYBERT_MODEL)
+        return _kw_model
+
+def warm_up(background: bool = True) -> None:
+    """
+    Load the model and run one tiny extraction ahead of the first enrichment.
+    Only the first call in a process does anything; by default it runs in a daemon thread.
+    """
+    global _warm_up_started
+    with _model_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def run():
+        try:
+            get_kw_model().extract_keywords("warm up", **KEYWORD_OPTIONS)
+        except Exception as e:
+            print(f"[KeyBERT warm-up failed] {e}")
+
+    if background:
+        threading.Thread(target=run, name="keybert-warm-up", daemon=True).start()
+    else:
+        run()
+
+def embed_texts(texts: list[str]):
+    """Document embeddings through the persistent store: only text never embedded before is encoded."""
+    return open_store(KEYBERT_MODEL).get(texts, lambda missing: get_kw_model().model.embed(missing))
+
+def embed_phrases(phrases: list[str], cache: dict):
+    """
+    Candidate phrase embeddings through the separate, size-capped phrase store, keyed
+    case-insensitively since the model is uncased; `cache` holds this run's lookups, so
+    each phrase is read from the store, or encoded if new, once per run.
+    """
+    missing = list(dict.fromkeys(p.lower() for p in phrases if p.lower() not in cache))
+    if missing:
+        vectors = open_store(KEYBERT_MODEL, "phrases").get(missing, lambda new: get_kw_model().model.embed(new))
+        cache.update(zip(missing, vectors))
+    return np.array([cache[p.lower()] for p in phrases])
+
+_fast_index = None  # False once the index has been found unusable in this process
+
+def _load_fast_index():
+    if not FastIndex.exists(FAST_INDEX_DIR):
+        return None
+    try:
+        index = FastIndex(FAST_INDEX_DIR)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ FAST index in {FAST_INDEX_DIR} could not be loaded ({e}); rebuild it")
+        return False
+    if index.meta.get("model") != KEYBERT_MODEL:
+        # Vectors from another model are meaningless here, or a different size altogether
+        print(f"⚠️ FAST index was built with {index.meta.get('model') or 'an unknown model'}, "
+              f"not {KEYBERT_MODEL}; ignoring it until it is rebuilt")
+        return False
+    return index
+
+def get_fast_index():
+    """The local FAST index (see utils/fast_index.py), loaded on first use; None until a usable one is built."""
+    global _fast_index
+    with _model_lock:
+        if _fast_index is None:
+            _fast_index = _load_fast_index()
+        return _fast_index or None
+
+def match_fast_headings(phrases: list[str], phrase_cache: dict | None = None) -> dict:
+    """phrase → matched FAST heading ({"label", "uri", "score", "matched"}) for phrases the local index can place."""
+    index = get_fast_index()
+    if index is None or not phrases:
+        return {}
+    matches = index.match(phrases, embed_phrases(phrases, {} if phrase_cache is None else phrase_cache))
+    return {p: m for p, m in zip(phrases, matches) if m}
+
+def _clean_subjects(keywords) -> list[str]:
+    # Extract phrases only, then de-duplicate and clean
+    subjects = [kw for kw, score in keywords]
+    return list(dict.fromkeys([s.title().strip() for s in subjects if len(s) > 2]))
 
 def extract_semantic_keywords(title: str, description: str) -> list[str]:
     """
@@ -16,48 +114,82 @@ def extract_semantic_keywords(title: str, description: str) -> list[str]:
         text = f"{title}. {description}".strip()
         if not text:
             return []
-
-        keywords = kw_model.extract_keywords(
-            text,
-            keyphrase_ngram_range=(1, 3),
-            stop_words='english',
-            top_n=8
-        )
-        # Extract phrases only
-        subjects = [kw for kw, score in keywords]
-        # De-duplicate and clean
-        subjects = list(dict.fromkeys([s.title().strip() for s in subjects if len(s) > 2]))
-        return subjects
+        return _clean_subjects(get_kw_model().extract_keywords(text, **KEYWORD_OPTIONS))
     except Exception:
         return []
 
-def enrich_with_fast_semantic(df: pd.DataFrame) -> pd.DataFrame:
+def extract_semantic_keywords_batch(texts: list[str], batch_size: int = ENRICH_BATCH_SIZE,
+                                    phrase_cache: dict | None = None) -> list[list[str]]:
     """
-    Enrich metadata with thematic English and Spanish subject phrases.
+    extract_semantic_keywords for many documents: each batch's documents and candidate
+    phrases are embedded together, then keywords are picked per document. Document and
+    candidate phrase embeddings come from their persistent stores, so a repeat run only
+    encodes new text. A batch that fails falls back to one document at a time.
     """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    kw_model = get_kw_model()
+    phrase_cache = {} if phrase_cache is None else phrase_cache
     results = []
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        try:
+            # KeyBERT refits this vectorizer on the same batch, so its vocabulary lines up with word_embeddings
+            count = CountVectorizer(ngram_range=KEYWORD_OPTIONS["keyphrase_ngram_range"],
+                                    stop_words=KEYWORD_OPTIONS["stop_words"]).fit(batch)
+            candidates = list(count.get_feature_names_out())
+            keywords = kw_model.extract_keywords(batch, vectorizer=count, top_n=KEYWORD_OPTIONS["top_n"],
+                                                 doc_embeddings=embed_texts(batch),
+                                                 word_embeddings=embed_phrases(candidates, phrase_cache))
+            if len(batch) == 1:  # KeyBERT unwraps single-document results
+                keywords = [keywords]
+            results.extend(_clean_subjects(kws) for kws in keywords)
+        except Exception:
+            results.extend(extract_semantic_keywords(text, "") for text in batch)
+    return results
 
+def enrich_with_fast_semantic(df: pd.DataFrame, batch_size: int = ENRICH_BATCH_SIZE) -> pd.DataFrame:
+    """
+    Enrich metadata with thematic English and Spanish subject phrases.
+    Keywords are extracted in batches and all phrases are translated in one batched call;
+    throughput is stored in the result's attrs["docs_per_sec"]. When a local FAST index
+    has been built, phrases are also mapped to authority-controlled FAST headings.
+    """
+    start = time.perf_counter()
+    rows = []
     for _, row in df.iterrows():
         title = str(row.get("Title (English)", "")).strip()
-        desc = str(row.get("Description (English)", "")).strip()
-        author = row.get("Author (English)", "")
-        oclc = row.get("OCLC Number", "")
+        if title:
+            rows.append((row, title, str(row.get("Description (English)", "")).strip()))
 
-        if not title:
-            continue
+    phrase_cache = {}  # this run's phrase embeddings, shared by extraction and FAST matching
+    subjects = extract_semantic_keywords_batch([f"{title}. {desc}".strip() for _, title, desc in rows],
+                                               batch_size, phrase_cache)
+    phrases = list(dict.fromkeys(s for subjects_en in subjects for s in subjects_en))
+    fast = match_fast_headings(phrases, phrase_cache)
+    fast_labels = list(dict.fromkeys(m["label"] for m in fast.values()))
+    translated = translate_batch(phrases + fast_labels)
+    spanish = dict(zip(phrases + fast_labels, translated))
 
-        subjects_en = extract_semantic_keywords(title, desc)
-        subjects_es = [translate_text(s) for s in subjects_en]
-
-        results.append({
-            "OCLC Number": oclc,
-            "Author": author,
+    has_index = get_fast_index() is not None
+    results = []
+    for (row, title, _), subjects_en in zip(rows, subjects):
+        result = {
+            "OCLC Number": row.get("OCLC Number", ""),
+            "Author": row.get("Author (English)", ""),
             "Title": title,
             "Subjects (EN)": "; ".join(subjects_en),
-            "Subjects (ES)": "; ".join(subjects_es)
-        })
-
-        # small pause to avoid too many translations in a row
-        time.sleep(0.5)
+            "Subjects (ES)": "; ".join(spanish[s] for s in subjects_en)
+        }
+        if has_index:
+            headings = list({fast[s]["uri"]: fast[s] for s in subjects_en if s in fast}.values())
+            result["FAST Subjects (EN)"] = "; ".join(h["label"] for h in headings)
+            result["FAST Subjects (ES)"] = "; ".join(spanish[h["label"]] for h in headings)
+            result["FAST URIs"] = "; ".join(h["uri"] for h in headings)
+        results.append(result)
 
-    return pd.DataFrame(results)
+    elapsed = time.perf_counter() - start
+    enriched = pd.DataFrame(results)
+    enriched.attrs["docs_per_sec"] = len(rows) / elapsed if elapsed else 0.0
+    print(f"🧠 Semantic enrichment: {len(rows)} docs in {elapsed:.1f}s ({enriched.attrs['docs_per_sec']:.1f} docs/sec)")
+    return enriched
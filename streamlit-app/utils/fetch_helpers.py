@@ -1,15 +1,36 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 import pandas as pd
 from dotenv import load_dotenv
-from utils.translation import translate_text
+from requests.adapters import HTTPAdapter
+from utils.rate_limit import TokenBucket
+from utils.translation import translate_batch
+from utils.worldcat_cache import fetch_bib
 
 load_dotenv()
 
 WS_KEY = os.getenv("WS_KEY")
 WS_SECRET = os.getenv("WS_SECRET")
 
+# Concurrency settings for batch fetches (requests in flight / requests per second)
+WORLDCAT_MAX_WORKERS = int(os.getenv("WORLDCAT_MAX_WORKERS", "4"))
+WORLDCAT_RATE_LIMIT = float(os.getenv("WORLDCAT_RATE_LIMIT", "3"))
+WORLDCAT_MAX_RETRIES = 3
+
+# English column → Spanish column filled in by the translation pass
+TRANSLATED_FIELDS = {
+    "Title (English)": "Title (Spanish)",
+    "Author (English)": "Author (Spanish)",
+    "Subjects (English)": "Subjects (Spanish)",
+    "Publisher (English)": "Publisher (Spanish)",
+    "Description (English)": "Description (Spanish)",
+    "Format (English)": "Format (Spanish)",
+    "Language (English)": "Language (Spanish)",
+}
+
 # Token cache to avoid refetching every record
 _token_cache = {"token": None, "expires_at": 0}
 
@@ -35,20 +56,31 @@ def fetch_oclc_token() -> str:
         raise Exception(f"Token Error {resp.status_code}: {resp.text}")
 
 
-def fetch_worldcat_data(oclc_number: str, token: str) -> dict | None:
-    """Fetch metadata for a given OCLC number."""
+def _request_worldcat(oclc_number: str, token: str, session=None, extra_headers=None) -> requests.Response:
+    """GET the bib record for an OCLC number; `session` may be a pooled requests.Session."""
     url = f"https://americas.discovery.api.oclc.org/worldcat/search/v2/bibs/{oclc_number}"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json", **(extra_headers or {})}
+    return (session or requests).get(url, headers=headers, timeout=20)
 
-    resp = requests.get(url, headers=headers, timeout=20)
-    if resp.status_code == 200:
-        return resp.json()
-    else:
-        return None
+
+def fetch_worldcat_data(oclc_number: str, token: str, session=None) -> dict | None:
+    """Fetch metadata for a given OCLC number (served from the local record cache when fresh)."""
+    return fetch_bib(oclc_number, lambda headers: _request_worldcat(oclc_number, token, session, headers))
+
+
+def translate_records(records: list[dict]) -> None:
+    """Fill the Spanish columns of cleaned records with one batched translation pass."""
+    slots = [(record, en, es) for record in records for en, es in TRANSLATED_FIELDS.items()]
+    translations = translate_batch([record[en] for record, en, _ in slots])
+    for (record, _, es), text in zip(slots, translations):
+        record[es] = text
 
 
-def clean_worldcat_data(data: dict, oclc_number: str) -> dict:
-    """Extract bilingual metadata fields from WorldCat record."""
+def clean_worldcat_data(data: dict, oclc_number: str, translate: bool = True) -> dict:
+    """
+    Extract bilingual metadata fields from WorldCat record.
+    With `translate=False` the Spanish columns are left empty for a later translate_records pass.
+    """
     def safe_get(obj, *keys):
         try:
             for k in keys:
@@ -82,62 +114,104 @@ def clean_worldcat_data(data: dict, oclc_number: str) -> dict:
     pub_date = safe_get(data, "date", "publicationDate")
     lang_en = safe_get(data, "language", "itemLanguage")
 
-    # Translate important fields
-    title_es = translate_text(title_en)
-    author_es = translate_text(author_en)
-    description_es = translate_text(description_en)
-    publisher_es = translate_text(publisher_en)
-    subjects_es = translate_text("; ".join(subjects))
-    format_es = translate_text(format_en)
-    lang_es = translate_text(lang_en)
-
-    return {
+    record = {
         "OCLC Number": oclc_number,
         "Title (English)": title_en,
-        "Title (Spanish)": title_es,
+        "Title (Spanish)": "",
         "Author (English)": author_en,
-        "Author (Spanish)": author_es,
+        "Author (Spanish)": "",
         "Subjects (English)": "; ".join(subjects),
-        "Subjects (Spanish)": subjects_es,
+        "Subjects (Spanish)": "",
         "Publisher (English)": publisher_en,
-        "Publisher (Spanish)": publisher_es,
+        "Publisher (Spanish)": "",
         "Description (English)": description_en,
-        "Description (Spanish)": description_es,
+        "Description (Spanish)": "",
         "Format (English)": format_en,
-        "Format (Spanish)": format_es,
+        "Format (Spanish)": "",
         "Date": pub_date,
         "Language (English)": lang_en,
-        "Language (Spanish)": lang_es
+        "Language (Spanish)": ""
     }
 
-
-def fetch_metadata_from_csv(df: pd.DataFrame) -> pd.DataFrame:
-    """Fetch metadata for each OCLC number in CSV."""
-    results = []
-    failed = []
-
+    # Translate important fields
+    if translate:
+        translate_records([record])
+    return record
+
+
+def _fetch_one(oclc_number: str, session, bucket: TokenBucket) -> dict:
+    """Fetch (or load from cache) and clean one record, retrying on 429/5xx. Raises on failure."""
+    def do_get(extra_headers):
+        for attempt in range(WORLDCAT_MAX_RETRIES):
+            bucket.acquire()
+            resp = _request_worldcat(oclc_number, fetch_oclc_token(), session, extra_headers)
+            if resp.status_code in (200, 304):
+                return resp
+            if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = resp.headers.get("Retry-After", "")
+                time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                continue
+            break
+        raise Exception(f"HTTP {resp.status_code}")
+
+    data = fetch_bib(oclc_number, do_get)
+    if data is None:
+        raise Exception("No WorldCat record returned")
+    return clean_worldcat_data(data, oclc_number, translate=False)
+
+
+def fetch_worldcat_records(oclc_numbers: list[str], max_workers: int = WORLDCAT_MAX_WORKERS,
+                           rate: float = WORLDCAT_RATE_LIMIT, progress=None) -> tuple[list, list[dict]]:
+    """
+    Fetch and clean many OCLC numbers concurrently (Spanish columns are left for translate_records).
+
+    At most `max_workers` requests are in flight and a token bucket caps them at
+    `rate` requests per second. Returns `(records, failures)`: `records` lines up
+    with `oclc_numbers` (None where the fetch failed) and `failures` is a list of
+    {"OCLC Number", "Error"} dicts. `progress(done, total)` is called as records finish.
+    """
+    records = [None] * len(oclc_numbers)
+    failures = []
+    bucket = TokenBucket(rate)
+    total = len(oclc_numbers)
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        session.mount("https://", HTTPAdapter(pool_maxsize=max(1, max_workers)))
+        futures = {pool.submit(_fetch_one, oclc, session, bucket): i for i, oclc in enumerate(oclc_numbers)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                records[i] = future.result()
+            except Exception as e:
+                failures.append({"OCLC Number": oclc_numbers[i], "Error": str(e)})
+            if progress:
+                progress(done, total)
+
+    return records, failures
+
+
+def fetch_metadata_from_csv(df: pd.DataFrame, progress=None) -> pd.DataFrame:
+    """
+    Fetch metadata for each OCLC number in CSV.
+
+    Rows keep the input order. Per-record failures are listed in
+    `result.attrs["failures"]` instead of being printed.
+    """
     try:
-        token = fetch_oclc_token()
+        fetch_oclc_token()
     except Exception as e:
         raise Exception(f"❌ Token fetch failed: {e}")
 
-    for _, row in df.iterrows():
-        oclc_number = str(row["OCLC Number"]).strip()
-        if not oclc_number:
-            continue
-        try:
-            wc_data = fetch_worldcat_data(oclc_number, token)
-            if wc_data:
-                record = clean_worldcat_data(wc_data, oclc_number)
-                results.append(record)
-            else:
-                failed.append(oclc_number)
-        except Exception as e:
-            failed.append(f"{oclc_number} ({e})")
-
-        time.sleep(1)  # polite delay
+    oclc_numbers = []
+    for value in df["OCLC Number"]:
+        oclc_number = "" if pd.isna(value) else str(value).strip()
+        if oclc_number:
+            oclc_numbers.append(oclc_number)
 
-    if failed:
-        print("⚠️ Failed:", ", ".join(failed))
+    records, failures = fetch_worldcat_records(oclc_numbers, progress=progress)
+    records = [r for r in records if r]
+    translate_records(records)
 
-    return pd.DataFrame(results)
+    result = pd.DataFrame(records)
+    result.attrs["failures"] = failures
+    return result
@@ -1,8 +1,8 @@
 # utils/omeka_api.py
 import os
-import json
-import requests
 from dotenv import load_dotenv
+from utils.omeka_uploader import make_session, send_with_retry, upload_items
+from utils.upload_journal import fingerprint, open_journal, row_key
 
 load_dotenv()
 
@@ -49,17 +49,50 @@ def row_to_omeka_json(row: dict) -> dict:
         "element_texts": metadata
     }
 
+_session = None
+
+
 def upload_item_to_omeka(row: dict):
-    """Upload one metadata row to Omeka Classic via API."""
+    """Upload one metadata row to Omeka Classic via API (pooled connection, retried on 429/5xx)."""
+    global _session
+    _session = _session or make_session()
     payload = row_to_omeka_json(row)
     try:
-        response = requests.post(
-            OMEKA_URL,
-            headers={"Content-Type": "application/json"},
-            params={"key": OMEKA_API_KEY},
-            data=json.dumps(payload),
-            timeout=60
-        )
+        response = send_with_retry(_session, "POST", OMEKA_URL, payload, params={"key": OMEKA_API_KEY})
         return response.status_code, response.text
     except Exception as e:
         return None, str(e)
+
+
+def upload_rows_to_omeka(rows: list[dict], journal=None):
+    """
+    Upload many metadata rows concurrently.
+    Yields {"index", "status", "id", "text"} per row as each upload finishes.
+
+    Outcomes go to the site's upload journal: rows already uploaded unchanged are
+    yielded with status "skipped", rows whose content changed are updated (PUT)
+    in place of creating a duplicate item.
+    """
+    journal = journal or open_journal(OMEKA_URL)
+    payloads = [row_to_omeka_json(row) for row in rows]
+    keys = [row_key(row, payload) for row, payload in zip(rows, payloads)]
+    fps = [fingerprint(payload) for payload in payloads]
+
+    pending, item_ids = [], []
+    for i in range(len(rows)):
+        action, item_id = journal.plan(keys[i], fps[i])
+        if action == "skip":
+            yield {"index": i, "status": "skipped", "id": item_id, "text": ""}
+        else:
+            pending.append(i)
+            item_ids.append(item_id)
+
+    results = upload_items([payloads[i] for i in pending], OMEKA_URL, OMEKA_API_KEY, item_ids=item_ids)
+    for result in results:
+        i = pending[result["index"]]
+        updating = item_ids[result["index"]] is not None
+        if result["id"]:
+            journal.record(keys[i], fps[i], result["id"], "updated" if updating else "created")
+        else:
+            journal.record(keys[i], fps[i], item_ids[result["index"]], "failed")
+        yield {**result, "index": i}
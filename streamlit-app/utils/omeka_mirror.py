@@ -0,0 +1,310 @@
+# utils/omeka_mirror.py
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One SQLite file per Omeka site, shared by every tool on this machine
+MIRROR_DIR = os.getenv(
+    "OMEKA_MIRROR_DIR", os.path.join(os.path.expanduser("~"), ".archivo_venezuela")
+)
+SYNC_PER_PAGE = int(os.getenv("OMEKA_PER_PAGE", "50"))
+FILES_MAX_WORKERS = int(os.getenv("OMEKA_FILES_WORKERS", "8"))
+
+# Bumped whenever the tables change; an older mirror is rebuilt by a full sweep
+SCHEMA_VERSION = "2"
+
+
+def normalize_timestamp(value: str) -> str:
+    """Omeka timestamps as sortable UTC strings (YYYY-MM-DDTHH:MM:SSZ); '' if unparseable."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except Exception:
+        return ""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class OmekaMirror:
+    """
+    Local SQLite copy of one Omeka site's items, kept current by sync_mirror().
+
+    Besides the raw item JSON, element texts, files and tags are stored in their
+    own indexed tables so validation and reporting can run as local queries.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                id       INTEGER PRIMARY KEY,
+                added    TEXT,
+                modified TEXT,
+                body     TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS element_texts (
+                item_id      INTEGER NOT NULL,
+                position     INTEGER NOT NULL,
+                element_set  TEXT,
+                element_name TEXT,
+                text         TEXT
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                id           INTEGER PRIMARY KEY,
+                item_id      INTEGER NOT NULL,
+                position     INTEGER NOT NULL,
+                original_url TEXT,
+                mime_type    TEXT,
+                filename     TEXT,
+                body         TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tags (
+                item_id INTEGER NOT NULL,
+                name    TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_added ON items (added);
+            CREATE INDEX IF NOT EXISTS idx_items_modified ON items (modified);
+            CREATE INDEX IF NOT EXISTS idx_element_texts_item ON element_texts (item_id);
+            CREATE INDEX IF NOT EXISTS idx_element_texts_name ON element_texts (element_name, item_id);
+            CREATE INDEX IF NOT EXISTS idx_files_item ON files (item_id);
+            CREATE INDEX IF NOT EXISTS idx_tags_item ON tags (item_id);
+            CREATE INDEX IF NOT EXISTS idx_tags_name ON tags (name);
+        """)
+        self._conn.commit()
+
+    def upsert(self, items: list[dict]) -> None:
+        """Store item payloads and replace their element text and tag rows."""
+        items = [it for it in items if it.get("id") is not None]
+        elements, tags = [], []
+        for it in items:
+            for pos, e in enumerate(it.get("element_texts") or []):
+                elements.append((it["id"], pos, (e.get("element_set") or {}).get("name"),
+                                 (e.get("element") or {}).get("name"), e.get("text")))
+            tags.extend((it["id"], t.get("name")) for t in it.get("tags") or [] if t.get("name"))
+
+        with self._lock:
+            ids = [(it["id"],) for it in items]
+            self._conn.executemany("DELETE FROM element_texts WHERE item_id = ?", ids)
+            self._conn.executemany("DELETE FROM tags WHERE item_id = ?", ids)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items (id, added, modified, body) VALUES (?, ?, ?, ?)",
+                [
+                    (it["id"], normalize_timestamp(it.get("added")), normalize_timestamp(it.get("modified")),
+                     json.dumps(it, ensure_ascii=False))
+                    for it in items
+                ],
+            )
+            self._conn.executemany("INSERT INTO element_texts VALUES (?, ?, ?, ?, ?)", elements)
+            self._conn.executemany("INSERT INTO tags VALUES (?, ?)", tags)
+            self._conn.commit()
+
+    def set_files(self, item_id: int, files: list[dict]) -> None:
+        """Replace the file rows of one item with the payloads from the files endpoint."""
+        rows = [
+            (f.get("id"), item_id, pos, (f.get("file_urls") or {}).get("original"), f.get("mime_type"),
+             f.get("original_filename") or f.get("filename"), json.dumps(f, ensure_ascii=False))
+            for pos, f in enumerate(files)
+        ]
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE item_id = ?", (item_id,))
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def delete(self, ids) -> None:
+        ids = [(i,) for i in ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM items WHERE id = ?", ids)
+            for table in ("element_texts", "files", "tags"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE item_id = ?", ids)
+            self._conn.commit()
+
+    def ids(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM items")}
+
+    def modified_of(self, ids) -> dict:
+        """{item id: stored modified timestamp} for those of `ids` already mirrored."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        with self._lock:
+            return dict(self._conn.execute(
+                f"SELECT id, modified FROM items WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall())
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def items(self, added_since: str | None = None, limit: int | None = None) -> list[dict]:
+        """Mirrored item payloads, newest first, optionally only those added since a timestamp."""
+        sql, args = "SELECT body FROM items", []
+        if added_since:
+            sql += " WHERE added >= ?"
+            args.append(normalize_timestamp(added_since))
+        sql += " ORDER BY added DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def files_for(self, item_ids) -> dict:
+        """{item id: [file payloads in upload order]} for the given items."""
+        ids = [int(i) for i in item_ids]
+        result = {i: [] for i in ids}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT item_id, body FROM files WHERE item_id IN ({','.join('?' * len(chunk))}) "
+                    "ORDER BY item_id, position",
+                    chunk,
+                ).fetchall()
+                for item_id, body in rows:
+                    result[item_id].append(json.loads(body))
+        return result
+
+    def element_rows(self) -> list[tuple]:
+        """(item id, element name, text) for every element text, newest items first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT e.item_id, e.element_name, e.text FROM element_texts e "
+                "JOIN items i ON i.id = e.item_id ORDER BY i.added DESC, i.id DESC, e.position"
+            ).fetchall()
+
+    def get_state(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def is_synced(self) -> bool:
+        """True once a sync has completed with the current schema, so the next one is incremental."""
+        return bool(self.get_state("high_water")) and self.get_state("schema") == SCHEMA_VERSION
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def mirror_path(api_url: str) -> str:
+    """SQLite file for a site, e.g. archivovenezuela.com/test/api/items → omeka_archivovenezuela_com_test.sqlite3."""
+    site = re.sub(r"/api/items/?$", "", api_url.split("://", 1)[-1])
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", site).strip("_")
+    return os.path.join(MIRROR_DIR, f"omeka_{slug}.sqlite3")
+
+
+def open_mirror(api_url: str) -> OmekaMirror:
+    """Shared mirror for a site's items endpoint."""
+    path = mirror_path(api_url)
+    with _mirrors_lock:
+        if path not in _mirrors:
+            _mirrors[path] = OmekaMirror(path)
+        return _mirrors[path]
+
+
+def _pages(session, api_url: str, params: dict):
+    """Yield item pages until the API returns an empty one."""
+    page = 1
+    while True:
+        resp = session.get(api_url, params={**params, "page": page}, timeout=30)
+        resp.raise_for_status()
+        batch = resp.json()
+        if not batch:
+            return
+        yield batch
+        page += 1
+
+
+def _sync_files(session, api_url: str, items: list[dict], mirror: OmekaMirror, key: dict) -> None:
+    """Refresh the file rows of changed items; items whose files count is 0 cost no request."""
+    def fetch(item):
+        files = item.get("files") if isinstance(item.get("files"), dict) else {}
+        if files.get("count") == 0:
+            return item["id"], []
+        url = files.get("url") or f"{api_url.replace('/items', '/files')}?item={item['id']}"
+        resp = session.get(url, params=key, timeout=30)
+        resp.raise_for_status()
+        return item["id"], resp.json()
+
+    with ThreadPoolExecutor(max_workers=max(1, FILES_MAX_WORKERS)) as pool:
+        for item_id, files in pool.map(fetch, [it for it in items if it.get("id") is not None]):
+            mirror.set_files(item_id, files)
+
+
+def sync_mirror(api_url: str, api_key: str | None = None, per_page: int = SYNC_PER_PAGE,
+                full: bool = False, mirror: OmekaMirror | None = None) -> dict:
+    """
+    Bring the local mirror up to date and return {"updated", "deleted", "total", "full_sweep"}.
+
+    Only items modified since the stored high-water mark are requested. Deletions are
+    detected cheaply: the remote Omeka-Total-Results count is compared with the local
+    row count, and only when they differ is the full id list swept (which also repairs
+    anything the incremental pass missed). Only new or changed items are rewritten and
+    have their files re-read. `full=True` forces that sweep.
+    """
+    mirror = mirror or open_mirror(api_url)
+    key = {"key": api_key} if api_key else {}
+    high_water = mirror.get_state("high_water")
+    rebuild = mirror.get_state("schema") != SCHEMA_VERSION
+    full = full or not high_water or rebuild
+    updated = deleted = 0
+
+    with requests.Session() as session:
+        session.mount("https://", HTTPAdapter(pool_maxsize=max(1, FILES_MAX_WORKERS)))
+        if not full:
+            params = {"per_page": per_page, "modified_since": high_water,
+                      "sort_field": "modified", "sort_dir": "a", **key}
+            for batch in _pages(session, api_url, params):
+                mirror.upsert(batch)
+                _sync_files(session, api_url, batch, mirror, key)
+                updated += len(batch)
+                high_water = max([high_water] + [normalize_timestamp(it.get("modified")) for it in batch])
+
+            head = session.get(api_url, params={"per_page": 1, "page": 1, **key}, timeout=30)
+            head.raise_for_status()
+            remote_total = head.headers.get("Omeka-Total-Results")
+            full = remote_total is None or int(remote_total) != mirror.count()
+
+        if full:
+            seen = set()
+            for batch in _pages(session, api_url, {"per_page": per_page, **key}):
+                known = {} if rebuild else mirror.modified_of(it["id"] for it in batch if it.get("id") is not None)
+                changed = [it for it in batch if known.get(it.get("id")) != normalize_timestamp(it.get("modified"))]
+                mirror.upsert(changed)
+                _sync_files(session, api_url, changed, mirror, key)
+                updated += len(changed)
+                seen.update(it.get("id") for it in batch)
+                high_water = max([high_water or ""] + [normalize_timestamp(it.get("modified")) for it in batch])
+            gone = mirror.ids() - seen
+            mirror.delete(gone)
+            deleted = len(gone)
+
+    if high_water:
+        mirror.set_state("high_water", high_water)
+    mirror.set_state("schema", SCHEMA_VERSION)
+    mirror.set_state("synced_at", str(time.time()))
+    return {"updated": updated, "deleted": deleted, "total": mirror.count(), "full_sweep": full}
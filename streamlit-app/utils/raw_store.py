@@ -0,0 +1,151 @@
+# utils/raw_store.py
+import os
+import json
+import hashlib
+import threading
+
+try:
+    import fcntl  # POSIX: lock the file itself so saves from several app processes don't interleave
+except ImportError:
+    fcntl = None
+
+RAW_STORE_PATH = os.getenv("RAW_STORE_PATH", "data/raw_metadata.jsonl")
+
+# The old single-document store, imported once into the JSONL store when found
+LEGACY_RAW_PATH = "data/raw_metadata.json"
+
+
+def record_key(record: dict) -> str:
+    """(source, id) of a record; records without an id are identified by their content."""
+    source = str(record.get("source") or "").strip()
+    rid = str(record.get("id") or "").strip()
+    if not rid:
+        rid = "content:" + record_digest(record)
+    return f"{source}\x1f{rid}"
+
+
+def record_digest(record: dict) -> str:
+    """Content hash of a record, unchanged by key order; any edit to the record changes it."""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RawStore:
+    """
+    Append-only JSON Lines store of aggregated records, deduplicated by (source, id).
+
+    Saving appends only the new or changed records, in one locked, fsynced write,
+    so its cost no longer grows with the archive and concurrent saves can't drop
+    each other's rows. Reading streams the file and yields the latest version of
+    each record, holding only keys and byte offsets in memory.
+    """
+
+    def __init__(self, path: str = RAW_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._digests = {}  # record key → digest of its latest version
+        self._offset = 0  # how far into the file _digests is up to date
+        self._index_lock = threading.Lock()
+        self._latest = {}  # record key → byte offset of its latest version
+        self._indexed = 0  # how far into the file _latest is up to date
+        self._inode = None
+
+    def _catch_up(self, f) -> None:
+        """Index lines appended since the last call (by this or another process)."""
+        f.seek(self._offset)
+        while True:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break  # EOF, or a torn last line from a crash
+            self._offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._digests[record_key(record)] = record_digest(record)
+
+    def append(self, records) -> int:
+        """Append records not already stored with the same content; returns how many were written."""
+        with self._lock, open(self.path, "a+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._catch_up(f)
+                f.seek(0, os.SEEK_END)
+                torn = f.tell() != self._offset
+                lines, written = [], {}
+                for record in records:
+                    key, digest = record_key(record), record_digest(record)
+                    if written.get(key, self._digests.get(key)) == digest:
+                        continue
+                    written[key] = digest
+                    lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+                if not lines:
+                    return 0
+                data = ("\n" if torn else "") + "".join(lines)  # keep a crash's half line on its own
+                f.write(data.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+                self._digests.update(written)
+                return len(lines)
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _index_latest(self) -> None:
+        """
+        Bring the key → offset-of-latest-version index up to date. It is kept between calls:
+        only lines appended since the last call are read, unless the file was replaced or
+        truncated meanwhile.
+        """
+        with self._index_lock, open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._indexed:
+                self._latest, self._indexed, self._inode = {}, 0, stat.st_ino
+            f.seek(self._indexed)
+            while True:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # EOF, or a line still being written
+                try:
+                    self._latest[record_key(json.loads(line))] = self._indexed
+                except ValueError:
+                    pass
+                self._indexed += len(line)
+
+    def iter_records(self):
+        """Stream the latest version of every record, in the order those versions were saved."""
+        if not os.path.exists(self.path):
+            return
+        self._index_latest()
+        with self._index_lock:
+            keep = set(self._latest.values())
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset in keep:
+                    yield json.loads(line)
+                offset += len(line)
+
+    __iter__ = iter_records
+
+    def count(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        self._index_latest()
+        return len(self._latest)
+
+
+def open_store(path: str = RAW_STORE_PATH, legacy_path: str = LEGACY_RAW_PATH) -> RawStore:
+    """The raw store, seeded from the old raw_metadata.json the first time it is opened."""
+    store = RawStore(path)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                store.append(json.load(f))
+        except ValueError:
+            pass
+    return store